@@ -1,39 +1,128 @@
 from __future__ import annotations
 
+import base64
 import json
+import multiprocessing
 import os
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from flask import (
     Flask,
+    Response,
     abort,
     g,
+    get_template_attribute,
     jsonify,
     redirect,
     render_template,
     request,
     send_file,
     session,
+    stream_template,
+    stream_with_context,
     url_for,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from database import DB_PATH, fetch_settlement, init_db, list_users, save_settlement_payload
-from utils import export_to_excel, export_to_pdf, format_datetime, send_email, translate_to_japanese
+from database import (
+    ADMIN_CORRECTION_TARGETS,
+    STATUS_CODES,
+    acquire_connection,
+    can_transition,
+    connection,
+    data_version_range,
+    database_id,
+    editable_statuses,
+    fetch_detail_rows,
+    fetch_settlement,
+    fetch_settlement_daily,
+    init_db,
+    list_users,
+    refresh_detail_summaries,
+    refresh_settlement_days,
+    release_connection,
+    save_settlement_payload,
+    transition_sources,
+    transition_status,
+)
+from export_cache import ExportCache
+from mailer import OUTBOX_STATUSES, enqueue_email, outbox_counts, outbox_sender, pending_email, register_on_sent, requeue_email
+from translation import phrase_table, text_hash, translation_cache
+from utils import (
+    export_to_pdf,
+    format_datetime,
+    iter_csv,
+    iter_ndjson,
+    iter_zip,
+    register_pdf_font,
+    render_export_document,
+    translate_many,
+    write_excel,
+)
+from writer import db_writer
 
 BASE_DIR = Path(__file__).resolve().parent
 EXPORT_DIR = BASE_DIR / "exports"
 EXPORT_DIR.mkdir(exist_ok=True)
-
-init_db()
+export_cache = ExportCache(EXPORT_DIR / "cache")
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("WECAR_SECRET_KEY", "wecar-dev-secret")
 app.permanent_session_lifetime = timedelta(hours=6)
 
+TRANSLATION_WORKERS = int(os.environ.get("WECAR_TRANSLATION_WORKERS", "2"))
+# 이 시간보다 오래 queued/running 인 작업은 중단된 것으로 보고 새 작업을 만든다.
+TRANSLATION_JOB_STALE_MINUTES = 10
+translation_executor = ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS, thread_name_prefix="wecar-translate")
+
+MAIL_KIND_DIAGNOSIS_RESULT = "diagnosis_result"
+MAIL_KIND_EVALUATOR_ASSIGNED = "evaluator_assigned"
+OUTBOX_PAGE_SIZE = 200
+# 관리자 일괄 작업 한 번에 받을 수 있는 진단 수
+BULK_MAX_IDS = 1000
+
+
+def _mark_diagnosis_sent(conn: sqlite3.Connection, outbox_row: sqlite3.Row, sent_at: str) -> None:
+    """진단 결과 메일이 실제로 전송되면 발송 기록과 같은 트랜잭션에서 전송완료로 바꾼다."""
+    if outbox_row["diagnosis_id"]:
+        conn.execute(
+            "UPDATE diagnosis_requests SET sent_at = ? WHERE id = ?",
+            (sent_at, outbox_row["diagnosis_id"]),
+        )
+        transition_status(conn, [outbox_row["diagnosis_id"]], "전송완료")
+
+
+register_on_sent(MAIL_KIND_DIAGNOSIS_RESULT, _mark_diagnosis_sent)
+app.jinja_env.globals["editable_statuses"] = editable_statuses
+
+
+def start_services() -> None:
+    """스키마 마이그레이션, 메일 발송기, 쓰기 스레드를 준비한다. 서버 프로세스에서 한 번 부른다."""
+    init_db()
+    outbox_sender.start()
+    db_writer.start()
+    # PDF 글꼴은 첫 내보내기 요청이 아니라 시작할 때 한 번 등록해 둔다
+    register_pdf_font()
+
+
+# python app.py 로 띄우면 묶음 렌더링 워커(spawn)가 이 모듈을 __mp_main__ 으로 다시 import 한다.
+# 워커에서는 마이그레이션이나 백그라운드 스레드를 시작하지 않는다.
+if multiprocessing.parent_process() is None:
+    start_services()
+
+ADMIN_PAGE_SIZE = int(os.environ.get("WECAR_ADMIN_PAGE_SIZE", "50"))
+ADMIN_MAX_PAGE_SIZE = 500
+# 목록 페이지를 스트리밍할 때 이만큼(문자 수) 모아서 내보낸다
+TEMPLATE_STREAM_CHUNK = 16 * 1024
+
 DEFAULT_REQUEST_ITEMS = [
     "외관 점검 내역",
     "실내 및 전장 점검 내역",
@@ -45,9 +134,7 @@ DEFAULT_REQUEST_ITEMS = [
 
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        g.db = conn
+        g.db = acquire_connection()
     return g.db
 
 
@@ -55,7 +142,7 @@ def get_db() -> sqlite3.Connection:
 def close_db(_: Optional[BaseException]) -> None:
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        release_connection(db)
 
 
 def login_required(func):
@@ -158,14 +245,15 @@ def _fetch_response_details(diagnosis_id: int) -> List[sqlite3.Row]:
     ).fetchall()
 
 
-def _summarize_details(rows: Iterable[sqlite3.Row], field: str) -> str:
-    parts: List[str] = []
-    for row in rows:
-        value = row[field]
-        if not value:
-            continue
-        parts.append(value.strip())
-    return "/".join(parts[:5])
+def _answer_dates(db: sqlite3.Connection, where: str, params: Tuple[Any, ...]) -> List[str]:
+    """정산 롤업(settlement_daily)을 다시 집계해야 하는 기존 답변일 목록."""
+    return [
+        row["answer_date"]
+        for row in db.execute(
+            f"SELECT answer_date FROM diagnosis_requests WHERE answer_date IS NOT NULL AND {where}",
+            params,
+        )
+    ]
 
 
 @app.route("/")
@@ -401,10 +489,13 @@ def admin_users_update():
 
     try:
         params.append(user_id)
+        # 평가사 이름이 바뀌면 정산 롤업의 평가사명도 바뀐다.
+        renamed_days = _answer_dates(db, "evaluator_id = ?", (user_id,)) if name and name != user["name"] else []
         db.execute(
             f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?",
             params,
         )
+        refresh_settlement_days(db, renamed_days)
         db.commit()
         return jsonify(success=True)
     except Exception as e:
@@ -423,33 +514,165 @@ def admin_users_delete():
     if user_id == session.get("user_id"):
         return jsonify(success=False, message="본인 계정은 삭제할 수 없습니다.")
     db = get_db()
+    # 삭제되는 사용자의 답변은 함께 지워지므로 해당 진단신청의 답변 요약을 다시 계산한다.
+    answered_ids = [
+        row["diagnosis_id"]
+        for row in db.execute(
+            "SELECT DISTINCT diagnosis_id FROM diagnosis_response_details WHERE responder_id = ?",
+            (user_id,),
+        )
+    ]
+    affected_days = _answer_dates(db, "(applicant_id = ? OR evaluator_id = ?)", (user_id, user_id))
     db.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    refresh_detail_summaries(db, answered_ids)
+    refresh_settlement_days(db, affected_days)
     db.commit()
     return jsonify(success=True)
 
 
-def _filter_clause(date_field: str = "request_date") -> Tuple[str, List[Any]]:
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
+def _parse_day(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def _date_range_clause(
+    date_field: str, start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[str, List[Any]]:
+    """
+    일자 범위를 [start, end + 1일) 반열린 구간의 문자열 비교로 만든다.
+    컬럼을 date() 로 감싸지 않으므로 인덱스를 그대로 사용할 수 있다.
+    """
     clauses = []
     params: List[Any] = []
-    if start_date:
-        clauses.append(f"date({date_field}) >= date(?)")
-        params.append(start_date)
-    if end_date:
-        clauses.append(f"date({date_field}) <= date(?)")
-        params.append(end_date)
+    start = _parse_day(start_date)
+    end = _parse_day(end_date)
+    if start:
+        clauses.append(f"{date_field} >= ?")
+        params.append(start.isoformat())
+    if end:
+        clauses.append(f"{date_field} < ?")
+        params.append((end + timedelta(days=1)).isoformat())
     clause = ""
     if clauses:
         clause = " AND " + " AND ".join(clauses)
     return clause, params
 
 
-@app.route("/admin/diagnosis")
-@login_required
-@role_required("관리자")
-def admin_diagnosis():
-    clause, params = _filter_clause("dr.request_date")
+def _filter_clause(date_field: str = "request_date") -> Tuple[str, List[Any]]:
+    return _date_range_clause(date_field, request.args.get("start_date"), request.args.get("end_date"))
+
+
+def _encode_cursor(row: sqlite3.Row) -> str:
+    raw = json.dumps([row["request_date"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        request_date, diagnosis_id = json.loads(raw)
+        return str(request_date), int(diagnosis_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _stream_page(template_name: str, **context: Any) -> Response:
+    """
+    템플릿을 stream_template 으로 렌더링하면서 TEMPLATE_STREAM_CHUNK 만큼씩 모아 내보낸다.
+    목록은 커서에서 하나씩 꺼내는 generator 로 넘기므로 첫 바이트까지의 시간과 메모리가 행 수와 무관하다.
+    """
+    parts = stream_template(template_name, **context)
+
+    def chunks():
+        buffer: List[str] = []
+        size = 0
+        try:
+            for part in parts:
+                buffer.append(part)
+                size += len(part)
+                if size >= TEMPLATE_STREAM_CHUNK:
+                    yield "".join(buffer)
+                    buffer = []
+                    size = 0
+            if buffer:
+                yield "".join(buffer)
+        finally:
+            # 중간에 연결이 끊겨도 요청 컨텍스트(과 DB 연결)를 바로 정리한다
+            parts.close()
+
+    return Response(chunks(), mimetype="text/html")
+
+
+class _KeysetPage:
+    """
+    (request_date, id) 키셋 페이지. 반복하면 행을 커서에서 하나씩 꺼내고,
+    다 꺼낸 뒤에 next_cursor/prev_cursor 가 채워진다 (템플릿에서는 표 아래에서 읽는다).
+    """
+
+    def __init__(self, rows: sqlite3.Cursor, page_size: int, after_cursor: bool, backward: bool) -> None:
+        self.page_size = page_size
+        self.next_cursor: Optional[str] = None
+        self.prev_cursor: Optional[str] = None
+        self._rows = rows
+        self._after_cursor = after_cursor
+        self._backward = backward
+
+    def __iter__(self):
+        if self._backward:
+            # 이전 페이지는 역순으로 읽으므로 한 페이지(최대 page_size + 1 행)를 모아 뒤집는다
+            rows = self._rows.fetchall()
+            has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            rows.reverse()
+            if rows:
+                self.next_cursor = _encode_cursor(rows[-1])
+                if has_more:
+                    self.prev_cursor = _encode_cursor(rows[0])
+            yield from rows
+            return
+
+        last = None
+        for count, row in enumerate(_iter_cursor(self._rows, self.page_size + 1), 1):
+            if count > self.page_size:
+                self.next_cursor = _encode_cursor(last)
+                break
+            if count == 1 and self._after_cursor:
+                self.prev_cursor = _encode_cursor(row)
+            last = row
+            yield row
+
+
+def _admin_diagnosis_page() -> _KeysetPage:
+    """
+    (request_date, id) 기준 키셋 페이지네이션으로 한 페이지를 조회한다.
+    커서 위치에서 인덱스를 바로 탐색하므로 페이지 깊이와 관계없이 비용이 일정하다.
+    """
+    page_size = request.args.get("page_size", type=int) or ADMIN_PAGE_SIZE
+    page_size = max(1, min(page_size, ADMIN_MAX_PAGE_SIZE))
+    cursor = _decode_cursor(request.args.get("cursor"))
+    backward = cursor is not None and request.args.get("direction") == "prev"
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+
+    if cursor is None:
+        clause, params = _date_range_clause("dr.request_date", start_date, end_date)
+    elif backward:
+        # 커서가 범위의 시작 경계보다 좁으므로 반대쪽 경계만 함께 건다.
+        clause, params = _date_range_clause("dr.request_date", None, end_date)
+        clause += " AND (dr.request_date, dr.id) > (?, ?)"
+        params.extend(cursor)
+    else:
+        clause, params = _date_range_clause("dr.request_date", start_date, None)
+        clause += " AND (dr.request_date, dr.id) < (?, ?)"
+        params.extend(cursor)
+
+    order = "ASC" if backward else "DESC"
     db = get_db()
     rows = db.execute(
         f"""
@@ -458,39 +681,76 @@ def admin_diagnosis():
         JOIN users applicant ON applicant.id = dr.applicant_id
         LEFT JOIN users evaluator ON evaluator.id = dr.evaluator_id
         WHERE 1=1 {clause}
-        ORDER BY dr.request_date DESC
+        ORDER BY dr.request_date {order}, dr.id {order}
+        LIMIT ?
         """,
-        params,
-    ).fetchall()
+        params + [page_size + 1],
+    )
+    return _KeysetPage(rows, page_size, after_cursor=cursor is not None, backward=backward)
 
-    enriched = []
-    for row in rows:
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        enriched.append(
-            {
-                "row": row,
-                "request_summary": _summarize_details(details, "content"),
-                "response_summary": _summarize_details(responses, "content"),
-            }
-        )
+
+@app.route("/admin/diagnosis")
+@login_required
+@role_required("관리자")
+def admin_diagnosis():
+    page = _admin_diagnosis_page()
 
     # 평가사 목록 가져오기
+    db = get_db()
     evaluators = db.execute(
         "SELECT id, name, email FROM users WHERE user_type = '평가사' ORDER BY name"
     ).fetchall()
 
     start_date = request.args.get("start_date", "")
     end_date = request.args.get("end_date", "")
-    return render_template(
+    return _stream_page(
         "admin/diagnosis.html",
-        diagnoses=enriched,
+        diagnoses=page,
+        page=page,
         evaluators=evaluators,
         start_date=start_date,
         end_date=end_date,
     )
 
 
+@app.route("/admin/diagnosis/json")
+@login_required
+@role_required("관리자")
+def admin_diagnosis_json():
+    """진단신청 목록의 한 페이지를 JSON으로 반환 (더보기용)"""
+    page = _admin_diagnosis_page()
+    rows = list(page)
+    start_index = request.args.get("start_index", type=int) or 1
+    render_row = get_template_attribute("admin/_diagnosis_row.html", "diagnosis_row")
+    rows_html = "".join(
+        str(render_row(row, index)) for index, row in enumerate(rows, start_index)
+    )
+    return jsonify(
+        success=True,
+        diagnoses=[
+            {
+                "id": row["id"],
+                "request_date": row["request_date"],
+                "status": row["status"],
+                "vehicle_number": row["vehicle_number"] or "",
+                "lot_number": row["lot_number"] or "",
+                "parking_number": row["parking_number"] or "",
+                "request_summary": row["request_summary"] or "",
+                "answer_date": row["answer_date"] or "",
+                "response_summary": row["response_summary"] or "",
+                "evaluator_name": row["evaluator_name"] or "",
+                "confirmed_at": row["confirmed_at"] or "",
+                "sent_at": row["sent_at"] or "",
+            }
+            for row in rows
+        ],
+        rows_html=rows_html,
+        page_size=page.page_size,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
+
+
 @app.route("/admin/diagnosis/<int:diagnosis_id>")
 @login_required
 @role_required("관리자")
@@ -561,104 +821,336 @@ def admin_diagnosis_confirm(diagnosis_id: int):
     if not _fetch_diagnosis(diagnosis_id):
         abort(404)
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    db = get_db()
-    db.execute(
-        "UPDATE diagnosis_requests SET confirmed_at = ? WHERE id = ?",
-        (now, diagnosis_id),
+    db_writer.run(
+        lambda conn: conn.execute(
+            "UPDATE diagnosis_requests SET confirmed_at = ? WHERE id = ?",
+            (now, diagnosis_id),
+        )
     )
-    db.commit()
     return jsonify(success=True, confirmed_at=now)
 
 
-@app.route("/admin/diagnosis/<int:diagnosis_id>/translate")
-@login_required
-@role_required("관리자")
-def admin_diagnosis_translate(diagnosis_id: int):
-    diagnosis = _fetch_diagnosis(diagnosis_id)
-    if not diagnosis:
-        abort(404)
-    details = _fetch_request_details(diagnosis_id)
-    responses = _fetch_response_details(diagnosis_id)
+# 번역 대상 헤더 필드와 원문 라벨
+TRANSLATION_HEADER_FIELDS = [
+    ("vehicle_number", "차량번호"),
+    ("lot_number", "출품번호"),
+    ("parking_number", "주차번호"),
+    ("evaluator_name", "평가사명"),
+]
+TRANSLATION_ROW_FIELDS = ("request_content", "response_content", "note")
 
-    # 헤더 정보 번역 (sqlite3.Row는 딕셔너리처럼 접근)
-    header_translations = {}
-    vehicle_number = diagnosis['vehicle_number'] if diagnosis['vehicle_number'] else None
-    lot_number = diagnosis['lot_number'] if diagnosis['lot_number'] else None
-    parking_number = diagnosis['parking_number'] if diagnosis['parking_number'] else None
-    evaluator_name = diagnosis['evaluator_name'] if diagnosis['evaluator_name'] else None
-    
-    if vehicle_number:
-        header_translations['vehicle_number'] = translate_to_japanese(f"차량번호: {vehicle_number}")
-    if lot_number:
-        header_translations['lot_number'] = translate_to_japanese(f"출품번호: {lot_number}")
-    if parking_number:
-        header_translations['parking_number'] = translate_to_japanese(f"주차번호: {parking_number}")
-    if evaluator_name:
-        header_translations['evaluator_name'] = translate_to_japanese(f"평가사명: {evaluator_name}")
-
-    # 표 형식으로 번역 데이터 구성
-    translated_table_data = []
-    response_map = {resp['sequence']: resp for resp in responses}
-    
-    for detail in details:
+
+def _translation_sources(diagnosis: sqlite3.Row) -> List[Tuple[str, str, str]]:
+    """번역할 원문을 (항목 키, 필드, 원문) 목록으로 만든다. 항목 키는 'header' 또는 'seq:<순번>'."""
+    sources = []
+    for field, label in TRANSLATION_HEADER_FIELDS:
+        if diagnosis[field]:
+            sources.append(("header", field, f"{label}: {diagnosis[field]}"))
+
+    response_map = {resp['sequence']: resp for resp in _fetch_response_details(diagnosis['id'])}
+    for detail in _fetch_request_details(diagnosis['id']):
         resp = response_map.get(detail['sequence'])
-        # 각 항목 번역
-        translated_request = translate_to_japanese(detail['content']) if detail['content'] else ""
-        translated_response = translate_to_japanese(resp['content']) if resp and resp['content'] else ""
-        translated_note = translate_to_japanese(resp['note']) if resp and resp['note'] else ""
-        
-        translated_table_data.append({
-            'sequence': detail['sequence'],
-            'request_content': translated_request,
-            'response_content': translated_response,
-            'note': translated_note,
-        })
+        item_key = f"seq:{detail['sequence']}"
+        sources.append((item_key, "request_content", detail['content'] or ""))
+        sources.append((item_key, "response_content", (resp['content'] or "") if resp else ""))
+        sources.append((item_key, "note", (resp['note'] or "") if resp else ""))
+    return sources
+
+
+def _split_stored_translations(
+    db: sqlite3.Connection, diagnosis_id: int, sources: List[Tuple[str, str, str]], force: bool = False
+) -> Tuple[Dict[Tuple[str, str], str], List[Tuple[str, str, str]]]:
+    """
+    저장된 번역 중 원문 해시가 그대로인 것은 재사용하고, 바뀐(또는 없는) 원문만 돌려준다.
+    force=True 이면 모두 다시 번역 대상으로 본다.
+    """
+    stored = {
+        (row["item_key"], row["field"]): row
+        for row in db.execute(
+            "SELECT item_key, field, source_hash, translated_text FROM diagnosis_translations WHERE diagnosis_id = ?",
+            (diagnosis_id,),
+        )
+    }
+    reused = {}
+    pending = []
+    for item_key, field, text in sources:
+        row = stored.get((item_key, field))
+        if not force and row is not None and row["source_hash"] == text_hash(text):
+            reused[(item_key, field)] = row["translated_text"]
+        else:
+            pending.append((item_key, field, text))
+    return reused, pending
+
+
+def _build_translated_data(
+    sources: List[Tuple[str, str, str]], translations: Dict[Tuple[str, str], str]
+) -> Dict[str, Any]:
+    """항목/필드별 번역을 번역 페이지가 쓰는 {'headers', 'table_data'} 형태로 조립한다."""
+    headers = {}
+    table_data = []
+    rows_by_key = {}
+    for item_key, field, _ in sources:
+        value = translations.get((item_key, field), "")
+        if item_key == "header":
+            headers[field] = value
+            continue
+        row = rows_by_key.get(item_key)
+        if row is None:
+            row = rows_by_key[item_key] = {'sequence': int(item_key.split(":", 1)[1])}
+            table_data.append(row)
+        row[field] = value
+    return {'headers': headers, 'table_data': table_data}
 
+
+def _translate_diagnosis(diagnosis_id: int, force: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    진단신청 한 건을 번역해 translated_summary 에 저장하고 번역 데이터를 반환한다.
+    원문이 바뀐 항목만 번역기로 보내고 나머지는 저장된 번역을 재사용한다.
+    """
+    diagnosis = _fetch_diagnosis(diagnosis_id)
+    if not diagnosis:
+        return None
     db = get_db()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
+    sources = _translation_sources(diagnosis)
+    translations, pending = _split_stored_translations(db, diagnosis_id, sources, force)
+
+    if pending:
+        # 실패한 번역이 원문 해시와 함께 저장되지 않도록 strict 로 호출한다
+        translated = translate_many([text for _, _, text in pending], refresh=force, strict=True)
+        rows = []
+        for (item_key, field, text), value in zip(pending, translated):
+            translations[(item_key, field)] = value
+            rows.append((diagnosis_id, item_key, field, text_hash(text), value))
+        db.executemany(
+            """
+            INSERT INTO diagnosis_translations (diagnosis_id, item_key, field, source_hash, translated_text)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(diagnosis_id, item_key, field) DO UPDATE SET
+                source_hash = excluded.source_hash,
+                translated_text = excluded.translated_text,
+                updated_at = datetime('now', 'localtime')
+            """,
+            rows,
+        )
+
+    # 삭제된 항목의 번역은 정리
+    current_keys = {(item_key, field) for item_key, field, _ in sources}
+    stale = [
+        (diagnosis_id, row["item_key"], row["field"])
+        for row in db.execute(
+            "SELECT item_key, field FROM diagnosis_translations WHERE diagnosis_id = ?", (diagnosis_id,)
+        )
+        if (row["item_key"], row["field"]) not in current_keys
+    ]
+    if stale:
+        db.executemany(
+            "DELETE FROM diagnosis_translations WHERE diagnosis_id = ? AND item_key = ? AND field = ?",
+            stale,
+        )
+
     # 번역된 내용을 저장 (표 형식 유지를 위해 JSON 형태로 저장)
-    translated_data = {
-        'headers': header_translations,
-        'table_data': translated_table_data,
-    }
-    translated_summary = json.dumps(translated_data, ensure_ascii=False)
-    
-    db.execute(
+    translated_data = _build_translated_data(sources, translations)
+    if pending or stale or not diagnosis['translated_summary']:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        db.execute(
+            """
+            UPDATE diagnosis_requests
+            SET translated_summary = ?, translated_at = ?
+            WHERE id = ?
+            """,
+            (json.dumps(translated_data, ensure_ascii=False), now, diagnosis_id),
+        )
+    db.commit()
+    return translated_data
+
+
+def _run_translation_job(job_id: int, diagnosis_id: int, force: bool = False) -> None:
+    """백그라운드 워커에서 번역 작업 하나를 실행한다."""
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "UPDATE translation_jobs SET status = 'running', started_at = datetime('now', 'localtime') WHERE id = ?",
+            (job_id,),
+        )
+        db.commit()
+        try:
+            translated_data = _translate_diagnosis(diagnosis_id, force)
+            if translated_data is None:
+                raise ValueError("진단신청을 찾을 수 없습니다.")
+        except Exception as e:
+            print(f"번역 작업 실패 (job {job_id}): {e}")
+            db.rollback()
+            db.execute(
+                """
+                UPDATE translation_jobs
+                SET status = 'failed', error = ?, finished_at = datetime('now', 'localtime')
+                WHERE id = ?
+                """,
+                (str(e), job_id),
+            )
+            db.commit()
+            return
+        db.execute(
+            """
+            UPDATE translation_jobs
+            SET status = 'done', result = ?, finished_at = datetime('now', 'localtime')
+            WHERE id = ?
+            """,
+            (json.dumps(translated_data, ensure_ascii=False), job_id),
+        )
+        db.commit()
+
+
+def _enqueue_translation_job(diagnosis_id: int, force: bool = False) -> sqlite3.Row:
+    """진행 중인 번역 작업이 있으면 그대로 반환하고, 없으면 새로 만들어 워커에 넘긴다."""
+    db = get_db()
+    job = db.execute(
         """
-        UPDATE diagnosis_requests
-        SET translated_summary = ?, translated_at = ?
-        WHERE id = ?
+        SELECT * FROM translation_jobs
+        WHERE diagnosis_id = ? AND status IN ('queued', 'running')
+          AND created_at >= datetime('now', 'localtime', ?)
+          AND force_refresh >= ?
+        ORDER BY id DESC LIMIT 1
         """,
-        (translated_summary, now, diagnosis_id),
+        (diagnosis_id, f"-{TRANSLATION_JOB_STALE_MINUTES} minutes", int(force)),
+    ).fetchone()
+    if job:
+        return job
+    cur = db.execute(
+        "INSERT INTO translation_jobs (diagnosis_id, requested_by, force_refresh) VALUES (?, ?, ?)",
+        (diagnosis_id, session.get("user_id"), int(force)),
     )
     db.commit()
+    translation_executor.submit(_run_translation_job, cur.lastrowid, diagnosis_id, force)
+    return db.execute("SELECT * FROM translation_jobs WHERE id = ?", (cur.lastrowid,)).fetchone()
+
+
+@app.route("/admin/diagnosis/<int:diagnosis_id>/translate")
+@login_required
+@role_required("관리자")
+def admin_diagnosis_translate(diagnosis_id: int):
+    """
+    원문이 그대로면 저장된 번역을 바로 보여주고, 바뀐 항목이 있으면 번역 작업을 등록한다.
+    refresh=1 이면 저장된 번역과 캐시를 무시하고 전체를 다시 번역한다.
+    """
+    diagnosis = _fetch_diagnosis(diagnosis_id)
+    if not diagnosis:
+        abort(404)
+    force = request.args.get("refresh") == "1"
+
+    job = None
+    job_id = request.args.get("job", type=int)
+    if job_id:
+        job = get_db().execute(
+            "SELECT * FROM translation_jobs WHERE id = ? AND diagnosis_id = ?",
+            (job_id, diagnosis_id),
+        ).fetchone()
+    if job is None and not force and diagnosis["translated_summary"]:
+        sources = _translation_sources(diagnosis)
+        translations, pending = _split_stored_translations(get_db(), diagnosis_id, sources)
+        if not pending:
+            translated_data = _build_translated_data(sources, translations)
+            return render_template(
+                "admin/diagnosis_translate.html",
+                diagnosis=diagnosis,
+                job=None,
+                translated_headers=translated_data["headers"],
+                translated_table_data=translated_data["table_data"],
+                generated_at=diagnosis["translated_at"],
+            )
+    if job is None:
+        job = _enqueue_translation_job(diagnosis_id, force)
 
+    translated_data = json.loads(job["result"]) if job["status"] == "done" and job["result"] else {}
     return render_template(
         "admin/diagnosis_translate.html",
         diagnosis=diagnosis,
-        translated_headers=header_translations,
-        translated_table_data=translated_table_data,
-        generated_at=now,
+        job=job,
+        translated_headers=translated_data.get("headers", {}),
+        translated_table_data=translated_data.get("table_data", []),
+        generated_at=job["finished_at"],
     )
 
 
-@app.route("/admin/diagnosis/<int:diagnosis_id>/send", methods=["POST"])
+@app.route("/admin/translation-jobs/<int:job_id>")
 @login_required
 @role_required("관리자")
-def admin_diagnosis_send(diagnosis_id: int):
-    diagnosis = _fetch_diagnosis(diagnosis_id)
-    if not diagnosis:
-        abort(404)
+def admin_translation_job_status(job_id: int):
+    """번역 작업 상태 조회 (폴링용)"""
+    job = get_db().execute("SELECT * FROM translation_jobs WHERE id = ?", (job_id,)).fetchone()
+    if not job:
+        return jsonify(success=False, message="번역 작업을 찾을 수 없습니다."), 404
+    return jsonify(
+        success=True,
+        job={
+            "id": job["id"],
+            "diagnosis_id": job["diagnosis_id"],
+            "status": job["status"],
+            "error": job["error"] or "",
+            "created_at": job["created_at"],
+            "started_at": job["started_at"] or "",
+            "finished_at": job["finished_at"] or "",
+        },
+    )
+
+
+@app.route("/admin/translation/cache")
+@login_required
+@role_required("관리자")
+def admin_translation_cache_stats():
+    """번역 캐시/고정 번역표 적중 통계 (prune=1 이면 만료/초과 항목 정리 후 반환)"""
+    removed = translation_cache.prune() if request.args.get("prune") == "1" else 0
+    return jsonify(success=True, stats=translation_cache.stats(), phrases=phrase_table.stats(), pruned=removed)
 
+
+@app.route("/admin/email-outbox")
+@login_required
+@role_required("관리자")
+def admin_email_outbox():
+    """메일 발송 대기열 조회 (대기/발송중/완료/실패)"""
+    status = request.args.get("status", "")
     db = get_db()
-    applicant = db.execute("SELECT * FROM users WHERE id = ?", (diagnosis["applicant_id"],)).fetchone()
-    if not applicant or not applicant["email"]:
-        return jsonify(success=False, message="회원의 이메일 주소가 없습니다.")
+    where = ""
+    params: List[Any] = []
+    if status in OUTBOX_STATUSES:
+        where = "WHERE status = ?"
+        params.append(status)
+    rows = db.execute(
+        f"""
+        SELECT id, kind, diagnosis_id, to_email, subject, status, attempts,
+               next_attempt_at, last_error, created_at, sent_at
+        FROM email_outbox
+        {where}
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        (*params, OUTBOX_PAGE_SIZE),
+    ).fetchall()
+    return render_template(
+        "admin/email_outbox.html",
+        rows=rows,
+        counts=outbox_counts(db),
+        status=status,
+        statuses=OUTBOX_STATUSES,
+    )
+
+
+@app.route("/admin/email-outbox/<int:outbox_id>/retry", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_email_outbox_retry(outbox_id: int):
+    """발송 실패(dead) 메일을 다시 대기열에 넣는다."""
+    db = get_db()
+    if not requeue_email(db, outbox_id):
+        return jsonify(success=False, message="재전송할 수 있는 메일이 아닙니다."), 404
+    db.commit()
+    outbox_sender.notify()
+    return jsonify(success=True)
 
+
+def _diagnosis_result_email(diagnosis: sqlite3.Row, applicant_name: str) -> Tuple[str, str]:
+    """번역된 진단 결과 메일의 제목과 HTML 본문을 만든다."""
     translated_summary = diagnosis["translated_summary"] or ""
-    if not translated_summary:
-        return jsonify(success=False, message="번역된 내용이 없습니다. 먼저 번역을 진행해주세요.")
 
     # JSON 형태로 저장된 번역 데이터 파싱
     try:
@@ -700,7 +1192,7 @@ def admin_diagnosis_send(diagnosis_id: int):
     <html>
     <body>
         <h2>위카아라이 진단 결과</h2>
-        <p>안녕하세요, {applicant['name']}님</p>
+        <p>안녕하세요, {applicant_name}님</p>
         <p>진단 신청 결과를 전송드립니다.</p>
         <hr>
         {translated_text}
@@ -709,82 +1201,168 @@ def admin_diagnosis_send(diagnosis_id: int):
     </body>
     </html>
     """
-
-    try:
-        if send_email(applicant["email"], subject, body_html):
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            db.execute(
-                "UPDATE diagnosis_requests SET sent_at = ?, status = '전송완료' WHERE id = ?",
-                (now, diagnosis_id),
-            )
-            db.commit()
-            return jsonify(success=True, sent_at=now)
-    except Exception as e:
-        error_message = str(e)
-        # 환경변수 미설정인 경우 더 친절한 메시지 제공
-        if "이메일 설정이 없습니다" in error_message:
-            error_message = "이메일 전송 설정이 되어있지 않습니다. 관리자에게 문의하세요."
-        return jsonify(success=False, message=f"이메일 전송에 실패했습니다: {error_message}")
-    
-    return jsonify(success=False, message="이메일 전송에 실패했습니다.")
+    return subject, body_html
 
 
-@app.route("/admin/diagnosis/update", methods=["POST"])
+@app.route("/admin/diagnosis/<int:diagnosis_id>/send", methods=["POST"])
 @login_required
 @role_required("관리자")
-def admin_diagnosis_update():
-    data = request.get_json()
-    diagnosis_id = data.get("id")
-    if not diagnosis_id:
-        return jsonify(success=False, message="잘못된 요청입니다.")
+def admin_diagnosis_send(diagnosis_id: int):
+    diagnosis = _fetch_diagnosis(diagnosis_id)
+    if not diagnosis:
+        abort(404)
 
     db = get_db()
-    diagnosis = db.execute("SELECT * FROM diagnosis_requests WHERE id = ?", (diagnosis_id,)).fetchone()
-    if not diagnosis:
-        return jsonify(success=False, message="진단신청을 찾을 수 없습니다.")
+    applicant = db.execute("SELECT * FROM users WHERE id = ?", (diagnosis["applicant_id"],)).fetchone()
+    if not applicant or not applicant["email"]:
+        return jsonify(success=False, message="회원의 이메일 주소가 없습니다.")
 
-    status = data.get("status")
-    vehicle_number = data.get("vehicle_number", "").strip()
-    lot_number = data.get("lot_number", "").strip()
-    parking_number = data.get("parking_number", "").strip()
+    translated_summary = diagnosis["translated_summary"] or ""
+    if not translated_summary:
+        return jsonify(success=False, message="번역된 내용이 없습니다. 먼저 번역을 진행해주세요.")
+    if not can_transition(diagnosis["status"], "전송완료"):
+        return jsonify(success=False, message=f"{diagnosis['status']} 상태에서는 전송할 수 없습니다."), 409
+
+    # 발송은 백그라운드 발송기가 맡고, 전송되면 sent_at/상태를 갱신한다 (_mark_diagnosis_sent)
+    queued = pending_email(db, MAIL_KIND_DIAGNOSIS_RESULT, diagnosis_id)
+    if queued:
+        return jsonify(success=True, queued=True, outbox_id=queued["id"], message="이미 전송 대기 중입니다.")
+    subject, body_html = _diagnosis_result_email(diagnosis, applicant["name"])
+    outbox_id = enqueue_email(
+        db, applicant["email"], subject, body_html,
+        kind=MAIL_KIND_DIAGNOSIS_RESULT, diagnosis_id=diagnosis_id,
+    )
+    db.commit()
+    outbox_sender.notify()
+    return jsonify(success=True, queued=True, outbox_id=outbox_id, message="전송 대기열에 등록되었습니다.")
 
-    try:
-        update_fields = []
-        params = []
 
-        if status:
-            update_fields.append("status = ?")
-            params.append(status)
-        if vehicle_number is not None:
-            update_fields.append("vehicle_number = ?")
-            params.append(vehicle_number if vehicle_number else None)
-        if lot_number is not None:
-            update_fields.append("lot_number = ?")
+@app.route("/admin/diagnosis/send-bulk", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_diagnosis_send_bulk():
+    """기간 내 번역이 끝났고 아직 전송하지 않은 진단 결과를 한꺼번에 발송 대기열에 넣는다."""
+    data = request.get_json(silent=True) or request.form
+    date_clause, params = _date_range_clause(
+        "dr.request_date", data.get("start_date"), data.get("end_date")
+    )
+    if not date_clause:
+        return jsonify(success=False, message="전송할 기간을 선택해주세요."), 400
+
+    sendable = [STATUS_CODES[name] for name in transition_sources("전송완료")]
+    db = get_db()
+    rows = db.execute(
+        f"""
+        SELECT dr.*, applicant.name AS applicant_name, applicant.email AS applicant_email
+        FROM diagnosis_requests dr
+        JOIN users AS applicant ON applicant.id = dr.applicant_id
+        WHERE dr.sent_at IS NULL
+          AND dr.translated_summary IS NOT NULL AND dr.translated_summary != ''
+          AND dr.status_code IN ({",".join("?" * len(sendable))})
+          {date_clause}
+          AND NOT EXISTS (
+              SELECT 1 FROM email_outbox o
+              WHERE o.diagnosis_id = dr.id AND o.kind = ? AND o.status IN ('queued', 'sending')
+          )
+        ORDER BY dr.request_date, dr.id
+        """,
+        (*sendable, *params, MAIL_KIND_DIAGNOSIS_RESULT),
+    ).fetchall()
+
+    queued = 0
+    skipped = 0
+    for row in rows:
+        if not row["applicant_email"]:
+            skipped += 1
+            continue
+        subject, body_html = _diagnosis_result_email(row, row["applicant_name"])
+        enqueue_email(
+            db, row["applicant_email"], subject, body_html,
+            kind=MAIL_KIND_DIAGNOSIS_RESULT, diagnosis_id=row["id"],
+        )
+        queued += 1
+    db.commit()
+    if queued:
+        outbox_sender.notify()
+    message = f"{queued}건을 전송 대기열에 등록했습니다."
+    if skipped:
+        message += f" (이메일 주소가 없는 {skipped}건 제외)"
+    return jsonify(success=True, queued=queued, skipped=skipped, message=message)
+
+
+def _status_conflict(diagnosis_id: int, target: str, message: Optional[str] = None, saved: bool = False):
+    """
+    상태 전이가 허용되지 않았거나 그 사이 상태가 바뀌었을 때의 응답 (409, 진단이 없으면 404).
+    saved=True 이면 같은 요청의 다른 항목은 저장되었다고 알린다.
+    """
+    row = get_db().execute("SELECT status FROM diagnosis_requests WHERE id = ?", (diagnosis_id,)).fetchone()
+    if not row:
+        return jsonify(success=False, message="진단신청을 찾을 수 없습니다."), 404
+    message = message or f"현재 상태({row['status']})에서는 {target}(으)로 바꿀 수 없습니다."
+    if saved:
+        message = f"다른 항목은 저장했습니다. {message}"
+    return jsonify(success=False, message=message, status=row["status"], saved=saved), 409
+
+
+def _apply_status_edit(db: sqlite3.Connection, diagnosis: sqlite3.Row, status: Optional[str], admin: bool = False) -> bool:
+    """
+    수정 화면에서 고른 상태를 반영한다 (커밋은 호출자가 한다).
+    고를 수 없는 상태이거나 그 사이 다른 요청이 상태를 바꿨으면 False.
+    """
+    current = diagnosis["status"]
+    if not status or status == current:
+        return True
+    if status not in editable_statuses(current, admin):
+        return False
+    return bool(transition_status(db, [diagnosis["id"]], status, expected=[current], admin=admin))
+
+
+@app.route("/admin/diagnosis/update", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_diagnosis_update():
+    data = request.get_json()
+    diagnosis_id = data.get("id")
+    if not diagnosis_id:
+        return jsonify(success=False, message="잘못된 요청입니다.")
+
+    db = get_db()
+    diagnosis = db.execute("SELECT * FROM diagnosis_requests WHERE id = ?", (diagnosis_id,)).fetchone()
+    if not diagnosis:
+        return jsonify(success=False, message="진단신청을 찾을 수 없습니다.")
+
+    status = data.get("status")
+    if status and status not in STATUS_CODES:
+        return jsonify(success=False, message="알 수 없는 상태입니다."), 400
+    vehicle_number = data.get("vehicle_number", "").strip()
+    lot_number = data.get("lot_number", "").strip()
+    parking_number = data.get("parking_number", "").strip()
+
+    try:
+        update_fields = []
+        params = []
+
+        if vehicle_number is not None:
+            update_fields.append("vehicle_number = ?")
+            params.append(vehicle_number if vehicle_number else None)
+        if lot_number is not None:
+            update_fields.append("lot_number = ?")
             params.append(lot_number if lot_number else None)
         if parking_number is not None:
             update_fields.append("parking_number = ?")
             params.append(parking_number if parking_number else None)
 
-        # 답변이 있는지 확인하여 답변일 자동 업데이트
-        responses = db.execute(
-            "SELECT COUNT(*) as count FROM diagnosis_responses WHERE diagnosis_id = ? AND content IS NOT NULL AND content != ''",
-            (diagnosis_id,)
-        ).fetchone()
-        
-        if responses["count"] > 0:
-            # 답변이 있으면 현재 시간으로 답변일 업데이트
-            from datetime import datetime
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            update_fields.append("answer_date = ?")
-            params.append(current_date)
-
         if update_fields:
             params.append(diagnosis_id)
             db.execute(
                 f"UPDATE diagnosis_requests SET {', '.join(update_fields)} WHERE id = ?",
                 params,
             )
-            db.commit()
+        # 관리자는 전송완료를 뺀 어느 상태로든 정정할 수 있다. 상태만 거절되어도 다른 항목은 저장한다.
+        status_applied = _apply_status_edit(db, diagnosis, status, admin=True)
+        db.commit()
+        if not status_applied:
+            return _status_conflict(diagnosis_id, status, saved=bool(update_fields))
 
         return jsonify(success=True)
     except Exception as e:
@@ -809,6 +1387,7 @@ def admin_diagnosis_delete():
     try:
         # 관련 데이터 삭제 (외래키 제약조건으로 자동 삭제됨)
         db.execute("DELETE FROM diagnosis_requests WHERE id = ?", (diagnosis_id,))
+        refresh_settlement_days(db, [diagnosis["answer_date"]])
         db.commit()
         return jsonify(success=True)
     except Exception as e:
@@ -838,6 +1417,8 @@ def evaluator_diagnosis_update():
 
     request_date = data.get("request_date")
     status = data.get("status")
+    if status and status not in STATUS_CODES:
+        return jsonify(success=False, message="알 수 없는 상태입니다."), 400
     vehicle_number = data.get("vehicle_number", "").strip()
     lot_number = data.get("lot_number", "").strip()
     parking_number = data.get("parking_number", "").strip()
@@ -849,9 +1430,6 @@ def evaluator_diagnosis_update():
         if request_date:
             update_fields.append("request_date = ?")
             params.append(request_date)
-        if status:
-            update_fields.append("status = ?")
-            params.append(status)
         if vehicle_number is not None:
             update_fields.append("vehicle_number = ?")
             params.append(vehicle_number if vehicle_number else None)
@@ -868,7 +1446,11 @@ def evaluator_diagnosis_update():
                 f"UPDATE diagnosis_requests SET {', '.join(update_fields)} WHERE id = ?",
                 params,
             )
-            db.commit()
+        # 상태만 거절되어도 다른 항목은 저장한다
+        status_applied = _apply_status_edit(db, diagnosis, status)
+        db.commit()
+        if not status_applied:
+            return _status_conflict(diagnosis_id, status, saved=bool(update_fields))
 
         return jsonify(success=True)
     except Exception as e:
@@ -876,17 +1458,260 @@ def evaluator_diagnosis_update():
         return jsonify(success=False, message=f"저장 중 오류가 발생했습니다: {str(e)}")
 
 
-@app.route("/admin/diagnosis/<int:diagnosis_id>/detail/export/<string:fmt>")
-@login_required
-@role_required("관리자")
-def admin_diagnosis_detail_export(diagnosis_id: int, fmt: str):
-    if fmt not in ("xlsx", "pdf"):
+EXPORT_MIMETYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+EXPORT_FORMATS = tuple(EXPORT_MIMETYPES)
+# csv/ndjson 은 파일을 만들지 않고 커서에서 바로 흘려보낸다
+STREAMING_EXPORTS = {"csv": iter_csv, "ndjson": iter_ndjson}
+EXPORT_FETCH_SIZE = 500
+# 이 행 수를 넘는 xlsx/pdf 내보내기는 요청 안에서 만들지 않고 백그라운드 작업으로 넘긴다
+EXPORT_INLINE_MAX_ROWS = int(os.environ.get("WECAR_EXPORT_INLINE_MAX_ROWS", "5000"))
+EXPORT_WORKERS = int(os.environ.get("WECAR_EXPORT_WORKERS", "2"))
+EXPORT_PROGRESS_EVERY = 500
+export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="wecar-export")
+
+
+def _iter_cursor(cursor: sqlite3.Cursor, size: int = EXPORT_FETCH_SIZE):
+    """fetchmany 로 size 행씩 읽어 한 행씩 돌려준다."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _attachment_header(filename: str) -> str:
+    """한글 파일명도 받을 수 있도록 RFC 5987 filename* 을 함께 붙인다."""
+    fallback = filename.encode("ascii", "ignore").decode("ascii").replace('"', "") or "export"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+ExportSpec = Callable[..., Tuple[List[str], Iterable[List[Any]]]]
+
+
+def _track_progress(rows: Iterable[List[Any]], callback: Callable[[int], None], every: int = EXPORT_PROGRESS_EVERY):
+    """행을 그대로 넘기면서 every 행마다(그리고 끝에) 처리한 행 수를 callback 으로 알린다."""
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if done % every == 0:
+            callback(done)
+    callback(done)
+
+
+def _write_export(
+    fileobj, spec: ExportSpec, params: Dict[str, Any], fmt: str, title: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    headers, data = spec(**params)
+    if on_progress is not None:
+        data = _track_progress(data, on_progress)
+    if fmt == "xlsx":
+        write_excel(data, headers, fileobj)
+    else:
+        export_to_pdf(data, headers, fileobj, title=title)
+
+
+def _send_export(spec: ExportSpec, params: Dict[str, Any], fmt: str, download_name: str, title: str):
+    """
+    spec(**params) 가 돌려주는 (헤더, 행) 으로 내보내기 응답을 만든다.
+    xlsx/pdf 는 (spec, params, 형식, 데이터 버전, DB 식별값) 키로 캐시해 두고, 같은 요청은 쿼리 없이 파일을 내려보낸다.
+    데이터 버전은 내보내기가 읽는 일자 구간의 버전이라 다른 날짜의 쓰기로는 캐시가 무효화되지 않는다.
+    행 수가 EXPORT_INLINE_MAX_ROWS 를 넘거나 async=1 이면 백그라운드 작업을 등록하고 진행 화면으로 보낸다.
+    csv/ndjson 은 캐시 없이 청크 단위로 흘려보내 첫 바이트가 바로 나간다.
+    """
+    if fmt in STREAMING_EXPORTS:
+        headers, data = spec(**params)
+        body = STREAMING_EXPORTS[fmt](data, headers)
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_MIMETYPES[fmt],
+            headers={"Content-Disposition": _attachment_header(f"{download_name}.{fmt}")},
+        )
+
+    version = EXPORT_VERSIONS.get(spec.__name__, _request_days_version)(**params)
+    key = export_cache.make_key(spec.__name__, params, fmt, version, database_id(get_db()))
+    fileobj = export_cache.open_cached(key, fmt)
+    if fileobj is None:
+        count = EXPORT_ROW_COUNTS.get(spec.__name__)
+        rows_total = count(**params) if count is not None else None
+        if request.args.get("async") == "1" or (rows_total or 0) > EXPORT_INLINE_MAX_ROWS:
+            job = _enqueue_export_job(spec, params, fmt, download_name, title, key, rows_total)
+            if request.accept_mimetypes.best == "application/json":
+                return jsonify(success=True, job=_export_job_payload(job)), 202
+            return redirect(url_for("export_job_view", job_id=job["id"]))
+        fileobj = export_cache.open_or_create(
+            key, fmt, lambda out: _write_export(out, spec, params, fmt, title)
+        )
+    return send_file(
+        fileobj,
+        as_attachment=True,
+        download_name=f"{download_name}.{fmt}",
+        mimetype=EXPORT_MIMETYPES[fmt],
+    )
+
+
+def _enqueue_export_job(
+    spec: ExportSpec, params: Dict[str, Any], fmt: str, download_name: str, title: str,
+    cache_key: str, rows_total: Optional[int],
+) -> sqlite3.Row:
+    """같은 캐시 키로 진행 중인 작업이 있으면 그대로 반환하고, 없으면 새로 만들어 워커에 넘긴다."""
+    db = get_db()
+    job = db.execute(
+        """
+        SELECT * FROM export_jobs
+        WHERE cache_key = ? AND status IN ('queued', 'running')
+        ORDER BY id DESC LIMIT 1
+        """,
+        (cache_key,),
+    ).fetchone()
+    if job:
+        return job
+    cur = db.execute(
+        """
+        INSERT INTO export_jobs (spec, params, fmt, title, download_name, cache_key, rows_total, requested_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            spec.__name__, json.dumps(params, ensure_ascii=False), fmt, title, download_name,
+            cache_key, rows_total, session.get("user_id"),
+        ),
+    )
+    db.commit()
+    export_executor.submit(_run_export_job, cur.lastrowid)
+    return db.execute("SELECT * FROM export_jobs WHERE id = ?", (cur.lastrowid,)).fetchone()
+
+
+def _run_export_job(job_id: int) -> None:
+    """백그라운드 워커에서 내보내기 파일을 만들어 캐시에 넣는다."""
+    with app.app_context():
+        db = get_db()
+        job = db.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,)).fetchone()
+        db.execute(
+            "UPDATE export_jobs SET status = 'running', started_at = datetime('now', 'localtime') WHERE id = ?",
+            (job_id,),
+        )
+        db.commit()
+
+        def report(done: int) -> None:
+            # 행을 읽고 있는 연결과 별개의 연결로 진행 상황을 기록한다
+            with connection() as conn:
+                conn.execute("UPDATE export_jobs SET rows_done = ? WHERE id = ?", (done, job_id))
+                conn.commit()
+
+        try:
+            spec = EXPORT_SPECS[job["spec"]]
+            params = json.loads(job["params"])
+            export_cache.open_or_create(
+                job["cache_key"], job["fmt"],
+                lambda out: _write_export(out, spec, params, job["fmt"], job["title"], report),
+            ).close()
+        except Exception as e:
+            print(f"내보내기 작업 실패 (job {job_id}): {e}")
+            db.rollback()
+            db.execute(
+                """
+                UPDATE export_jobs
+                SET status = 'failed', error = ?, finished_at = datetime('now', 'localtime')
+                WHERE id = ?
+                """,
+                (str(e), job_id),
+            )
+            db.commit()
+            return
+        db.execute(
+            "UPDATE export_jobs SET status = 'done', finished_at = datetime('now', 'localtime') WHERE id = ?",
+            (job_id,),
+        )
+        db.commit()
+
+
+def _fetch_export_job(job_id: int) -> sqlite3.Row:
+    """본인이 요청한 작업(관리자는 모든 작업)만 조회할 수 있다."""
+    job = get_db().execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,)).fetchone()
+    if not job:
         abort(404)
-    diagnosis = _fetch_diagnosis(diagnosis_id)
-    if not diagnosis:
+    if session.get("user_type") != "관리자" and job["requested_by"] != session.get("user_id"):
         abort(404)
-    details = _fetch_request_details(diagnosis_id)
-    responses = _fetch_response_details(diagnosis_id)
+    return job
+
+
+def _export_job_payload(job: sqlite3.Row) -> Dict[str, Any]:
+    rows_total = job["rows_total"]
+    progress = None
+    if job["status"] == "done":
+        progress = 100
+    elif rows_total:
+        progress = min(99, int(job["rows_done"] * 100 / rows_total))
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "fmt": job["fmt"],
+        "download_name": f"{job['download_name']}.{job['fmt']}",
+        "rows_total": rows_total,
+        "rows_done": job["rows_done"],
+        "progress": progress,
+        "error": job["error"] or "",
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"] or "",
+        "download_url": url_for("export_job_download", job_id=job["id"]) if job["status"] == "done" else "",
+    }
+
+
+@app.route("/exports/jobs/<int:job_id>")
+@login_required
+def export_job_status(job_id: int):
+    """내보내기 작업 진행 상황 (폴링용)"""
+    return jsonify(success=True, job=_export_job_payload(_fetch_export_job(job_id)))
+
+
+@app.route("/exports/jobs/<int:job_id>/view")
+@login_required
+def export_job_view(job_id: int):
+    """내보내기 작업 진행 화면. 완료되면 자동으로 내려받는다."""
+    job = _fetch_export_job(job_id)
+    return render_template("export_job.html", job=_export_job_payload(job), title=job["title"])
+
+
+@app.route("/exports/jobs/<int:job_id>/download")
+@login_required
+def export_job_download(job_id: int):
+    job = _fetch_export_job(job_id)
+    if job["status"] != "done":
+        return jsonify(success=False, message="아직 파일이 준비되지 않았습니다."), 409
+    fileobj = export_cache.open_cached(job["cache_key"], job["fmt"])
+    if fileobj is None:
+        return jsonify(success=False, message="보관 기간이 지나 파일이 정리되었습니다. 다시 내보내기 해주세요."), 410
+    return send_file(
+        fileobj,
+        as_attachment=True,
+        download_name=f"{job['download_name']}.{job['fmt']}",
+        mimetype=EXPORT_MIMETYPES[job["fmt"]],
+    )
+
+
+@app.route("/admin/export/cache")
+@login_required
+@role_required("관리자")
+def admin_export_cache_stats():
+    """내보내기 캐시 적중 통계 (prune=1 이면 오래된/초과 파일 정리 후 반환)"""
+    removed = export_cache.evict() if request.args.get("prune") == "1" else 0
+    return jsonify(success=True, stats=export_cache.stats(), pruned=removed)
+
+
+def _diagnosis_detail_export_spec(diagnosis_id: int) -> Tuple[List[str], Iterable[List[Any]]]:
+    return _diagnosis_detail_table(_fetch_request_details(diagnosis_id), _fetch_response_details(diagnosis_id))
+
+
+def _diagnosis_detail_table(
+    details: List[sqlite3.Row], responses: List[sqlite3.Row]
+) -> Tuple[List[str], List[List[Any]]]:
+    """신청 항목과 답변 행을 상세 내보내기의 (헤더, 행) 으로 만든다."""
     headers = ["순", "진단신청내역", "답변내역", "비고"]
     data = []
     response_map = {resp["sequence"]: resp for resp in responses}
@@ -900,42 +1725,179 @@ def admin_diagnosis_detail_export(diagnosis_id: int, fmt: str):
                 resp["note"] if resp else "",
             ]
         )
+    return headers, data
+
+
+@app.route("/admin/diagnosis/<int:diagnosis_id>/detail/export/<string:fmt>")
+@login_required
+@role_required("관리자")
+def admin_diagnosis_detail_export(diagnosis_id: int, fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    diagnosis = _fetch_diagnosis(diagnosis_id)
+    if not diagnosis:
+        abort(404)
     safe_vehicle = (diagnosis["vehicle_number"] or f"diagnosis_{diagnosis_id}").replace(" ", "_")
-    filename = EXPORT_DIR / f"{safe_vehicle}_detail.{fmt}"
-    if fmt == "xlsx":
-        export_to_excel(data, headers, filename)
+    return _send_export(
+        _diagnosis_detail_export_spec, {"diagnosis_id": diagnosis_id},
+        fmt, f"{safe_vehicle}_detail", title="진단신청 상세",
+    )
+
+
+# 진단 상세 묶음(ZIP): ReportLab 렌더링은 CPU 를 쓰므로 GIL 을 피해 프로세스 풀에서 문서별로 나눠 만든다
+BUNDLE_WORKERS = int(os.environ.get("WECAR_BUNDLE_WORKERS", "0")) or (os.cpu_count() or 1)
+BUNDLE_MAX_DOCUMENTS = int(os.environ.get("WECAR_BUNDLE_MAX_DOCUMENTS", "1000"))
+BUNDLE_FORMATS = ("pdf", "xlsx")
+_bundle_pool: Optional[ProcessPoolExecutor] = None
+_bundle_pool_lock = threading.Lock()
+
+
+def _get_bundle_pool() -> ProcessPoolExecutor:
+    """처음 쓸 때 프로세스 풀을 만든다. 워커는 시작할 때 PDF 글꼴을 한 번 등록한다."""
+    global _bundle_pool
+    with _bundle_pool_lock:
+        if _bundle_pool is None:
+            _bundle_pool = ProcessPoolExecutor(
+                max_workers=BUNDLE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=register_pdf_font,
+            )
+        return _bundle_pool
+
+
+def _discard_bundle_pool(pool: ProcessPoolExecutor) -> None:
+    """워커가 죽어 깨진 풀은 버리고 다음 요청에서 새로 만든다."""
+    global _bundle_pool
+    with _bundle_pool_lock:
+        if _bundle_pool is pool:
+            _bundle_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_bundle(tasks: List[Tuple[str, str, str, List[str], List[List[Any]]]]):
+    """
+    문서들을 프로세스 풀에 넘기고 끝나는 순서대로 (이름, 바이트) 를 내보낸다.
+    마지막에 문서별 렌더링 시간을 담은 manifest.json 을 덧붙인다.
+    """
+    started = time.perf_counter()
+    pool = _get_bundle_pool()
+    futures = {pool.submit(render_export_document, task): task[0] for task in tasks}
+    timings: List[Dict[str, Any]] = []
+    try:
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                name, data, seconds = future.result()
+            except BrokenProcessPool:
+                _discard_bundle_pool(pool)
+                raise
+            except Exception as e:
+                print(f"진단 상세 묶음 문서 실패 ({name}): {e}")
+                timings.append({"file": name, "seconds": None, "error": str(e)})
+                continue
+            timings.append({"file": name, "seconds": round(seconds, 3), "bytes": len(data)})
+            yield name, data
+    finally:
+        # 내려받기가 중간에 끊기면 아직 시작하지 않은 문서는 만들지 않는다
+        for future in futures:
+            future.cancel()
+
+    elapsed = time.perf_counter() - started
+    render_total = sum(item["seconds"] or 0 for item in timings)
+    print(
+        f"진단 상세 묶음: {len(tasks)}건, {elapsed:.2f}초 "
+        f"(문서별 렌더링 합계 {render_total:.2f}초, 워커 {BUNDLE_WORKERS}개)"
+    )
+    manifest = {
+        "documents": len(tasks),
+        "failed": sum(1 for item in timings if item.get("error")),
+        "workers": BUNDLE_WORKERS,
+        "elapsed_seconds": round(elapsed, 3),
+        "render_seconds_total": round(render_total, 3),
+        "timings": sorted(timings, key=lambda item: item["file"]),
+    }
+    yield "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+@app.route("/admin/diagnosis/bundle/<string:fmt>")
+@login_required
+@role_required("관리자")
+def admin_diagnosis_bundle_export(fmt: str):
+    """
+    선택한 진단(ids=1,2,3) 또는 기간(start_date/end_date)의 진단 상세를
+    차량별 PDF/엑셀 파일로 만들어 ZIP 으로 내려받는다.
+    """
+    if fmt not in BUNDLE_FORMATS:
+        abort(404)
+    db = get_db()
+    ids_arg = request.args.get("ids", "").strip()
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    if ids_arg:
+        try:
+            ids = sorted({int(value) for value in ids_arg.split(",") if value.strip()})
+        except ValueError:
+            return jsonify(success=False, message="잘못된 진단 번호입니다."), 400
+        # 자리표시자를 만들기 전에 개수를 제한해 SQLite 변수 한도를 넘지 않게 한다
+        if len(ids) > BUNDLE_MAX_DOCUMENTS:
+            return jsonify(
+                success=False, message=f"한 번에 {BUNDLE_MAX_DOCUMENTS}건까지 내보낼 수 있습니다. (요청 {len(ids)}건)"
+            ), 400
+        placeholders = ",".join("?" * len(ids))
+        rows = db.execute(
+            f"SELECT id, vehicle_number FROM diagnosis_requests WHERE id IN ({placeholders}) ORDER BY id",
+            ids,
+        ).fetchall()
+        download_name = f"diagnosis_detail_{len(rows)}"
+    elif start_date or end_date:
+        clause, params = _date_range_clause("request_date", start_date, end_date)
+        rows = db.execute(
+            f"SELECT id, vehicle_number FROM diagnosis_requests WHERE 1=1 {clause} ORDER BY request_date, id",
+            params,
+        ).fetchall()
+        download_name = f"diagnosis_detail_{start_date or ''}_{end_date or ''}"
     else:
-        export_to_pdf(data, headers, filename, title="진단신청 상세")
-    return send_file(filename, as_attachment=True)
+        return jsonify(success=False, message="진단을 선택하거나 기간을 입력해주세요."), 400
+    if not rows:
+        return jsonify(success=False, message="내보낼 진단이 없습니다."), 404
+    if len(rows) > BUNDLE_MAX_DOCUMENTS:
+        return jsonify(
+            success=False, message=f"한 번에 {BUNDLE_MAX_DOCUMENTS}건까지 내보낼 수 있습니다. (요청 {len(rows)}건)"
+        ), 400
+
+    # 데이터는 여기서 모두 읽어 두고, 워커 프로세스에는 행만 넘긴다
+    # 문서마다 조회하지 않고 선택한 진단의 항목/답변을 청크 단위 IN 조회로 한 번에 읽는다
+    detail_rows = fetch_detail_rows(db, [row["id"] for row in rows])
+    tasks = []
+    for row in rows:
+        headers, data = _diagnosis_detail_table(*detail_rows[row["id"]])
+        safe_vehicle = (row["vehicle_number"] or f"diagnosis_{row['id']}").replace(" ", "_").replace("/", "_")
+        tasks.append((f"{row['id']}_{safe_vehicle}_detail.{fmt}", fmt, "진단신청 상세", headers, data))
+    return Response(
+        stream_with_context(iter_zip(_render_bundle(tasks))),
+        mimetype="application/zip",
+        headers={"Content-Disposition": _attachment_header(f"{download_name}.zip")},
+    )
 
 
-def _collect_admin_export_rows(start_date: str, end_date: str) -> List[sqlite3.Row]:
+def _collect_admin_export_rows(start_date: str, end_date: str) -> sqlite3.Cursor:
+    """내보내기 대상 행을 커서로 반환한다 (전부 읽어 두지 않는다)."""
     db = get_db()
-    clause = "WHERE date(dr.request_date) BETWEEN date(?) AND date(?)"
+    clause, params = _date_range_clause("dr.request_date", start_date, end_date)
     return db.execute(
         f"""
         SELECT dr.*, applicant.name AS applicant_name, evaluator.name AS evaluator_name
         FROM diagnosis_requests dr
         JOIN users applicant ON applicant.id = dr.applicant_id
         LEFT JOIN users evaluator ON evaluator.id = dr.evaluator_id
-        {clause}
+        WHERE 1=1 {clause}
         ORDER BY dr.request_date DESC
         """,
-        (start_date, end_date),
-    ).fetchall()
-
+        params,
+    )
 
-@app.route("/admin/diagnosis/export/<string:fmt>")
-@login_required
-@role_required("관리자")
-def admin_diagnosis_export(fmt: str):
-    if fmt not in ("xlsx", "pdf"):
-        abort(404)
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-    if not start_date or not end_date:
-        return redirect(url_for("admin_diagnosis"))
 
+def _admin_diagnosis_export_spec(start_date: str, end_date: str) -> Tuple[List[str], Iterable[List[Any]]]:
     rows = _collect_admin_export_rows(start_date, end_date)
     headers = [
         "순",
@@ -951,32 +1913,48 @@ def admin_diagnosis_export(fmt: str):
         "확인일",
         "전송일",
     ]
-    data = []
-    for idx, row in enumerate(rows, 1):
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        data.append(
-            [
-                idx,
-                row["request_date"],
-                row["status"],
-                row["vehicle_number"],
-                row["lot_number"],
-                row["parking_number"],
-                _summarize_details(details, "content"),
-                row["answer_date"] or "",
-                _summarize_details(responses, "content"),
-                row["evaluator_name"] or row["evaluator_name"] or "",
-                row["confirmed_at"] or "",
-                row["sent_at"] or "",
-            ]
-        )
-    filename = EXPORT_DIR / f"admin_diagnosis_{start_date}_{end_date}.{fmt}"
-    if fmt == "xlsx":
-        export_to_excel(data, headers, filename)
-    else:
-        export_to_pdf(data, headers, filename, title="진단신청관리")
-    return send_file(filename, as_attachment=True)
+    data = (
+        [
+            idx,
+            row["request_date"],
+            row["status"],
+            row["vehicle_number"],
+            row["lot_number"],
+            row["parking_number"],
+            row["request_summary"] or "",
+            row["answer_date"] or "",
+            row["response_summary"] or "",
+            row["evaluator_name"] or row["evaluator_name"] or "",
+            row["confirmed_at"] or "",
+            row["sent_at"] or "",
+        ]
+        for idx, row in enumerate(_iter_cursor(rows), 1)
+    )
+    return headers, data
+
+
+def _admin_diagnosis_export_count(start_date: str, end_date: str) -> int:
+    clause, params = _date_range_clause("dr.request_date", start_date, end_date)
+    return get_db().execute(
+        f"SELECT COUNT(*) FROM diagnosis_requests dr WHERE 1=1 {clause}", params
+    ).fetchone()[0]
+
+
+@app.route("/admin/diagnosis/export/<string:fmt>")
+@login_required
+@role_required("관리자")
+def admin_diagnosis_export(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    if not start_date or not end_date:
+        return redirect(url_for("admin_diagnosis"))
+
+    return _send_export(
+        _admin_diagnosis_export_spec, {"start_date": start_date, "end_date": end_date},
+        fmt, f"admin_diagnosis_{start_date}_{end_date}", title="진단신청관리",
+    )
 
 
 def _aggregate_settlement_rows(year: int, month: int) -> Dict[str, Any]:
@@ -987,30 +1965,15 @@ def _aggregate_settlement_rows(year: int, month: int) -> Dict[str, Any]:
     else:
         end_date = f"{year}-{month + 1:02d}-01"
 
-    rows = db.execute(
-        """
-        SELECT date(dr.answer_date) AS answer_day,
-               COALESCE(evaluator.name, dr.evaluator_name) AS evaluator_name,
-               COUNT(*) AS cnt
-        FROM diagnosis_requests dr
-        LEFT JOIN users evaluator ON evaluator.id = dr.evaluator_id
-        WHERE dr.answer_date IS NOT NULL
-          AND dr.answer_date != ''
-          AND date(dr.answer_date) >= date(?)
-          AND date(dr.answer_date) < date(?)
-        GROUP BY answer_day, evaluator_name
-        ORDER BY answer_day ASC, evaluator_name ASC
-        """,
-        (start_date, end_date),
-    ).fetchall()
+    rows = fetch_settlement_daily(db, start_date, end_date)
 
     grouped: Dict[str, Dict[str, Any]] = {}
     total_amount = 0
     total_count = 0
 
     for row in rows:
-        day = row["answer_day"]
-        evaluator_name = row["evaluator_name"] or "미지정"
+        day = row["day"]
+        evaluator_name = row["evaluator_name"]
         if day not in grouped:
             grouped[day] = {
                 "rows": [],
@@ -1109,17 +2072,7 @@ def admin_settlement_view(settlement_id: int):
     )
 
 
-@app.route("/admin/settlements/export/<string:fmt>")
-@login_required
-@role_required("관리자")
-def admin_settlements_export(fmt: str):
-    if fmt not in ("xlsx", "pdf"):
-        abort(404)
-    year = request.args.get("year", type=int)
-    month = request.args.get("month", type=int)
-    if not year or not month:
-        return redirect(url_for("admin_settlements"))
-
+def _settlement_export_spec(year: int, month: int) -> Tuple[List[str], Iterable[List[Any]]]:
     payload = _aggregate_settlement_rows(year, month)
     headers = ["일자", "평가사", "건수", "금액", "VAT", "청구액"]
     data: List[List[Any]] = []
@@ -1155,12 +2108,24 @@ def admin_settlements_export(fmt: str):
             payload["total_grand"],
         ]
     )
-    filename = EXPORT_DIR / f"settlement_{year}_{month:02d}.{fmt}"
-    if fmt == "xlsx":
-        export_to_excel(data, headers, filename)
-    else:
-        export_to_pdf(data, headers, filename, title="정산내역")
-    return send_file(filename, as_attachment=True)
+    return headers, data
+
+
+@app.route("/admin/settlements/export/<string:fmt>")
+@login_required
+@role_required("관리자")
+def admin_settlements_export(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    year = request.args.get("year", type=int)
+    month = request.args.get("month", type=int)
+    if not year or not month:
+        return redirect(url_for("admin_settlements"))
+
+    return _send_export(
+        _settlement_export_spec, {"year": year, "month": month},
+        fmt, f"settlement_{year}_{month:02d}", title="정산내역",
+    )
 
 
 # ------------------- 진단신청자 영역 ------------------- #
@@ -1208,27 +2173,28 @@ def diagnosis_request():
             details=details,
         )
 
-    db = get_db()
-    cur = db.cursor()
-    cur.execute(
-        """
-        INSERT INTO diagnosis_requests (applicant_id, vehicle_number, lot_number, parking_number)
-        VALUES (?, ?, ?, ?)
-        """,
-        (session["user_id"], vehicle_number, lot_number, parking_number),
-    )
-    diagnosis_id = cur.lastrowid
+    applicant_id = session["user_id"]
 
-    for seq, content in details:
-        cur.execute(
+    def insert_request(conn: sqlite3.Connection) -> int:
+        cur = conn.execute(
+            """
+            INSERT INTO diagnosis_requests (applicant_id, vehicle_number, lot_number, parking_number)
+            VALUES (?, ?, ?, ?)
+            """,
+            (applicant_id, vehicle_number, lot_number, parking_number),
+        )
+        diagnosis_id = cur.lastrowid
+        conn.executemany(
             """
             INSERT INTO diagnosis_request_items (diagnosis_id, sequence, content)
             VALUES (?, ?, ?)
             """,
-            (diagnosis_id, seq, content),
+            [(diagnosis_id, seq, content) for seq, content in details],
         )
+        refresh_detail_summaries(conn, [diagnosis_id])
+        return diagnosis_id
 
-    db.commit()
+    db_writer.run(insert_request)
     return redirect(url_for("diagnosis_dashboard"))
 
 
@@ -1243,78 +2209,70 @@ def diagnosis_history():
         SELECT * FROM diagnosis_requests
         WHERE applicant_id = ?
     """
-    params: List[Any] = [session["user_id"]]
-    if start_date:
-        query += " AND date(request_date) >= date(?)"
-        params.append(start_date)
-    if end_date:
-        query += " AND date(request_date) <= date(?)"
-        params.append(end_date)
+    clause, range_params = _date_range_clause("request_date", start_date, end_date)
+    query += clause
+    params: List[Any] = [session["user_id"]] + range_params
     query += " ORDER BY request_date DESC LIMIT 10"
     rows = db.execute(query, params).fetchall()
-    enriched = []
-    for row in rows:
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        enriched.append(
-            {
-                "row": row,
-                "request_summary": _summarize_details(details, "content"),
-                "response_summary": _summarize_details(responses, "content"),
-            }
-        )
     return render_template(
         "diagnosis/history.html",
-        diagnoses=enriched,
+        diagnoses=rows,
         start_date=start_date or "",
         end_date=end_date or "",
     )
 
 
-@app.route("/diagnosis/history/export/<string:fmt>")
-@login_required
-@role_required("진단신청")
-def diagnosis_history_export(fmt: str):
-    if fmt not in ("xlsx", "pdf"):
-        abort(404)
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
+def _diagnosis_history_export_spec(
+    user_id: int, start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[List[str], Iterable[List[Any]]]:
     db = get_db()
     query = """
         SELECT * FROM diagnosis_requests
         WHERE applicant_id = ?
     """
-    params: List[Any] = [session["user_id"]]
-    if start_date:
-        query += " AND date(request_date) >= date(?)"
-        params.append(start_date)
-    if end_date:
-        query += " AND date(request_date) <= date(?)"
-        params.append(end_date)
-    rows = db.execute(query, params).fetchall()
+    clause, range_params = _date_range_clause("request_date", start_date, end_date)
+    query += clause
+    params: List[Any] = [user_id] + range_params
+    rows = db.execute(query, params)
     headers = ["신청일", "상태", "차량번호", "출품번호", "주차번호", "진단신청", "답변", "답변일"]
-    data = []
-    for row in rows:
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        data.append(
-            [
-                row["request_date"],
-                row["status"],
-                row["vehicle_number"],
-                row["lot_number"],
-                row["parking_number"],
-                _summarize_details(details, "content"),
-                _summarize_details(responses, "content"),
-                row["answer_date"] or "",
-            ]
-        )
-    filename = EXPORT_DIR / f"diagnosis_history_{session['username']}.{fmt}"
-    if fmt == "xlsx":
-        export_to_excel(data, headers, filename)
-    else:
-        export_to_pdf(data, headers, filename, title="진단신청내역")
-    return send_file(filename, as_attachment=True)
+    data = (
+        [
+            row["request_date"],
+            row["status"],
+            row["vehicle_number"],
+            row["lot_number"],
+            row["parking_number"],
+            row["request_summary"] or "",
+            row["response_summary"] or "",
+            row["answer_date"] or "",
+        ]
+        for row in _iter_cursor(rows)
+    )
+    return headers, data
+
+
+def _diagnosis_history_export_count(user_id: int, start_date: Optional[str], end_date: Optional[str]) -> int:
+    clause, params = _date_range_clause("request_date", start_date, end_date)
+    return get_db().execute(
+        f"SELECT COUNT(*) FROM diagnosis_requests WHERE applicant_id = ? {clause}", [user_id] + params
+    ).fetchone()[0]
+
+
+@app.route("/diagnosis/history/export/<string:fmt>")
+@login_required
+@role_required("진단신청")
+def diagnosis_history_export(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    params = {
+        "user_id": session["user_id"],
+        "start_date": request.args.get("start_date"),
+        "end_date": request.args.get("end_date"),
+    }
+    return _send_export(
+        _diagnosis_history_export_spec, params,
+        fmt, f"diagnosis_history_{session['username']}", title="진단신청내역",
+    )
 
 
 # ------------------- 평가사 영역 ------------------- #
@@ -1342,7 +2300,7 @@ def evaluator_status():
         ORDER BY dr.request_date DESC
         """,
         params,
-    ).fetchall()
+    )
 
     evaluators = db.execute(
         "SELECT * FROM users WHERE user_type = '평가사' AND approved = 1"
@@ -1350,9 +2308,9 @@ def evaluator_status():
 
     start_date = request.args.get("start_date", "")
     end_date = request.args.get("end_date", "")
-    return render_template(
+    return _stream_page(
         "evaluator/status.html",
-        requests=rows,
+        requests=_iter_cursor(rows),
         evaluators=evaluators,
         start_date=start_date,
         end_date=end_date,
@@ -1394,48 +2352,47 @@ def admin_assign_evaluator(diagnosis_id: int):
         if not diagnosis:
             return jsonify(success=False, message="진단신청을 찾을 수 없습니다."), 404
 
-        # 평가사 배정
-        db.execute(
+        # 평가사 배정 (신청/평가사배정 상태에서만)
+        if not transition_status(
+            db, [diagnosis_id], "평가사배정", evaluator_id=evaluator_id, evaluator_name=evaluator_name
+        ):
+            db.rollback()
+            return _status_conflict(diagnosis_id, "평가사배정")
+        refresh_settlement_days(db, [diagnosis["answer_date"]])
+
+        # 평가사에게 알림 이메일 (이메일이 있는 경우) - 배정과 같은 트랜잭션에서 대기열에 넣는다
+        if evaluator_email:
+            # sqlite3.Row는 딕셔너리처럼 접근 (None 체크 필요)
+            vehicle_num = diagnosis['vehicle_number'] or '차량번호 없음'
+            lot_num = diagnosis['lot_number'] or ''
+            parking_num = diagnosis['parking_number'] or ''
+            request_date = diagnosis['request_date'] or ''
+
+            subject = f"진단 신청 배정 알림 - {vehicle_num}"
+            body_html = f"""
+            <html>
+            <body>
+                <h2>진단 신청 배정 알림</h2>
+                <p>안녕하세요, {evaluator_name}님</p>
+                <p>새로운 진단 신청이 배정되었습니다.</p>
+                <hr>
+                <p><strong>차량번호:</strong> {vehicle_num}</p>
+                <p><strong>출품번호:</strong> {lot_num}</p>
+                <p><strong>주차번호:</strong> {parking_num}</p>
+                <p><strong>신청일:</strong> {request_date}</p>
+                <hr>
+                <p>평가사 페이지에서 답변을 입력해주세요.</p>
+                <p>위카모빌리티 주식회사</p>
+            </body>
+            </html>
             """
-            UPDATE diagnosis_requests
-            SET evaluator_id = ?, evaluator_name = ?, status = '평가사배정'
-            WHERE id = ?
-            """,
-            (evaluator_id, evaluator_name, diagnosis_id),
-        )
+            enqueue_email(
+                db, evaluator_email, subject, body_html,
+                kind=MAIL_KIND_EVALUATOR_ASSIGNED, diagnosis_id=diagnosis_id,
+            )
         db.commit()
-
-        # 평가사에게 알림 이메일 전송 (이메일이 있는 경우)
         if evaluator_email:
-            try:
-                # sqlite3.Row는 딕셔너리처럼 접근 (None 체크 필요)
-                vehicle_num = diagnosis['vehicle_number'] or '차량번호 없음'
-                lot_num = diagnosis['lot_number'] or ''
-                parking_num = diagnosis['parking_number'] or ''
-                request_date = diagnosis['request_date'] or ''
-                
-                subject = f"진단 신청 배정 알림 - {vehicle_num}"
-                body_html = f"""
-                <html>
-                <body>
-                    <h2>진단 신청 배정 알림</h2>
-                    <p>안녕하세요, {evaluator_name}님</p>
-                    <p>새로운 진단 신청이 배정되었습니다.</p>
-                    <hr>
-                    <p><strong>차량번호:</strong> {vehicle_num}</p>
-                    <p><strong>출품번호:</strong> {lot_num}</p>
-                    <p><strong>주차번호:</strong> {parking_num}</p>
-                    <p><strong>신청일:</strong> {request_date}</p>
-                    <hr>
-                    <p>평가사 페이지에서 답변을 입력해주세요.</p>
-                    <p>위카모빌리티 주식회사</p>
-                </body>
-                </html>
-                """
-                send_email(evaluator_email, subject, body_html)
-            except Exception as e:
-                # 이메일 전송 실패해도 평가사 배정은 성공으로 처리
-                print(f"이메일 전송 실패 (평가사 배정은 성공): {e}")
+            outbox_sender.notify()
 
         return jsonify(success=True, evaluator_name=evaluator_name)
     except Exception as e:
@@ -1445,6 +2402,194 @@ def admin_assign_evaluator(diagnosis_id: int):
         return jsonify(success=False, message=f"오류가 발생했습니다: {str(e)}"), 500
 
 
+def _bulk_ids(data: Dict[str, Any]) -> Tuple[List[int], List[int], Any]:
+    """
+    일괄 작업 요청의 ids 를 검사해 (존재하는 id 목록, 없는 id 목록, None) 을 반환한다.
+    잘못된 요청이면 세 번째 값으로 오류 응답을 돌려준다. 존재 여부는 한 번의 IN 조회로 확인한다.
+    """
+    raw_ids = data.get("ids")
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return [], [], (jsonify(success=False, message="진단을 선택해주세요."), 400)
+    try:
+        ids = sorted({int(value) for value in raw_ids})
+    except (TypeError, ValueError):
+        return [], [], (jsonify(success=False, message="잘못된 진단 번호입니다."), 400)
+    if len(ids) > BULK_MAX_IDS:
+        return [], [], (jsonify(success=False, message=f"한 번에 {BULK_MAX_IDS}건까지 처리할 수 있습니다."), 400)
+    found = [
+        row["id"]
+        for row in get_db().execute(
+            f"SELECT id FROM diagnosis_requests WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id", ids
+        )
+    ]
+    missing = sorted(set(ids) - set(found))
+    if not found:
+        return [], missing, (jsonify(success=False, message="진단신청을 찾을 수 없습니다.", missing=missing), 404)
+    return found, missing, None
+
+
+def _bulk_result(requested: List[int], missing: List[int], done: List[int], verb: str, **extra: Any):
+    """
+    일괄 작업 결과: 처리한 id, 상태 때문에 건너뛴 id(skipped), 존재하지 않는 id(missing)를 함께 돌려준다.
+    """
+    skipped = sorted(set(requested) - set(done))
+    message = f"{len(done)}건을 {verb}했습니다."
+    excluded = []
+    if skipped:
+        excluded.append(f"현재 상태에서 처리할 수 없는 {len(skipped)}건")
+    if missing:
+        excluded.append(f"존재하지 않는 {len(missing)}건")
+    if excluded:
+        message += f" ({', '.join(excluded)} 제외)"
+    return jsonify(
+        success=True, updated=sorted(done), skipped=skipped, missing=missing, message=message, **extra
+    )
+
+
+def _evaluator_assigned_email(evaluator_name: str, rows: List[sqlite3.Row]) -> Tuple[str, str]:
+    """여러 건을 한 평가사에게 배정했을 때 보내는 묶음 알림 메일."""
+    subject = f"진단 신청 배정 알림 - {len(rows)}건"
+    items = "".join(
+        f"<tr><td>{row['vehicle_number'] or '차량번호 없음'}</td><td>{row['lot_number'] or ''}</td>"
+        f"<td>{row['parking_number'] or ''}</td><td>{row['request_date'] or ''}</td></tr>"
+        for row in rows
+    )
+    body_html = f"""
+    <html>
+    <body>
+        <h2>진단 신청 배정 알림</h2>
+        <p>안녕하세요, {evaluator_name}님</p>
+        <p>새로운 진단 신청 {len(rows)}건이 배정되었습니다.</p>
+        <hr>
+        <table border="1" cellpadding="4" cellspacing="0">
+            <tr><th>차량번호</th><th>출품번호</th><th>주차번호</th><th>신청일</th></tr>
+            {items}
+        </table>
+        <hr>
+        <p>평가사 페이지에서 답변을 입력해주세요.</p>
+        <p>위카모빌리티 주식회사</p>
+    </body>
+    </html>
+    """
+    return subject, body_html
+
+
+@app.route("/admin/diagnosis/bulk/assign-evaluator", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_bulk_assign_evaluator():
+    """선택한 진단들에 같은 평가사를 한 번에 배정하고, 평가사에게는 알림 메일을 한 통만 보낸다."""
+    data = request.get_json(silent=True) or {}
+    ids, missing, error = _bulk_ids(data)
+    if error:
+        return error
+    evaluator_id = data.get("evaluator_id")
+    manual_name = (data.get("manual_name") or "").strip()
+
+    db = get_db()
+    evaluator_email = None
+    if evaluator_id:
+        evaluator = db.execute(
+            "SELECT * FROM users WHERE id = ? AND user_type = '평가사'", (evaluator_id,)
+        ).fetchone()
+        if not evaluator:
+            return jsonify(success=False, message="평가사를 찾을 수 없습니다."), 404
+        evaluator_name = evaluator["name"] or ""
+        evaluator_email = evaluator["email"]
+    elif manual_name:
+        evaluator_id = None
+        evaluator_name = manual_name
+    else:
+        return jsonify(success=False, message="평가사를 선택하거나 입력해주세요."), 400
+
+    placeholders = ",".join("?" * len(ids))
+    answer_dates = _answer_dates(db, f"id IN ({placeholders})", tuple(ids))
+    assigned = transition_status(
+        db, ids, "평가사배정", evaluator_id=evaluator_id, evaluator_name=evaluator_name
+    )
+    if assigned and evaluator_email:
+        rows = db.execute(
+            f"""
+            SELECT vehicle_number, lot_number, parking_number, request_date
+            FROM diagnosis_requests WHERE id IN ({",".join("?" * len(assigned))})
+            ORDER BY request_date, id
+            """,
+            assigned,
+        ).fetchall()
+        subject, body_html = _evaluator_assigned_email(evaluator_name, rows)
+        enqueue_email(db, evaluator_email, subject, body_html, kind=MAIL_KIND_EVALUATOR_ASSIGNED)
+    refresh_settlement_days(db, answer_dates)
+    db.commit()
+    if assigned and evaluator_email:
+        outbox_sender.notify()
+    return _bulk_result(ids, missing, assigned, "배정")
+
+
+@app.route("/admin/diagnosis/bulk/status", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_bulk_status():
+    """
+    선택한 진단들의 상태를 한 번에 정정한다 (행 수정과 같은 관리자 정정).
+    전송완료는 메일이 실제로 전송될 때만 바뀌므로 여기서는 고를 수 없다.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    if status not in ADMIN_CORRECTION_TARGETS:
+        return jsonify(success=False, message="일괄 변경할 수 없는 상태입니다."), 400
+    ids, missing, error = _bulk_ids(data)
+    if error:
+        return error
+    db = get_db()
+    updated = transition_status(db, ids, status, admin=True)
+    db.commit()
+    return _bulk_result(ids, missing, updated, "변경")
+
+
+@app.route("/admin/diagnosis/bulk/confirm", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_bulk_confirm():
+    data = request.get_json(silent=True) or {}
+    ids, missing, error = _bulk_ids(data)
+    if error:
+        return error
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    db = get_db()
+    confirmed = [
+        row["id"]
+        for row in db.execute(
+            f"UPDATE diagnosis_requests SET confirmed_at = ? WHERE id IN ({','.join('?' * len(ids))}) RETURNING id",
+            (now, *ids),
+        ).fetchall()
+    ]
+    db.commit()
+    return _bulk_result(ids, missing, confirmed, "확인 처리", confirmed_at=now)
+
+
+@app.route("/admin/diagnosis/bulk/delete", methods=["POST"])
+@login_required
+@role_required("관리자")
+def admin_bulk_delete():
+    data = request.get_json(silent=True) or {}
+    ids, missing, error = _bulk_ids(data)
+    if error:
+        return error
+    db = get_db()
+    try:
+        # 관련 데이터는 외래키 제약조건으로 함께 삭제된다
+        deleted = db.execute(
+            f"DELETE FROM diagnosis_requests WHERE id IN ({','.join('?' * len(ids))}) RETURNING id, answer_date",
+            ids,
+        ).fetchall()
+        refresh_settlement_days(db, [row["answer_date"] for row in deleted])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        return jsonify(success=False, message=f"삭제 중 오류가 발생했습니다: {str(e)}"), 500
+    return _bulk_result(ids, missing, [row["id"] for row in deleted], "삭제")
+
+
 @app.route("/evaluator/status/assign", methods=["POST"])
 @login_required
 @role_required("평가사")
@@ -1469,16 +2614,19 @@ def evaluator_assign():
     else:
         return jsonify(success=False, message="평가사를 선택하거나 입력해주세요.")
 
-    db.execute(
-        """
-        UPDATE diagnosis_requests
-        SET evaluator_id = ?, evaluator_name = ?, status = '평가사배정'
-        WHERE id = ?
-        """,
-        (evaluator_id, evaluator_name, diagnosis_id),
-    )
-    db.commit()
-
+    def assign(conn: sqlite3.Connection) -> bool:
+        # 신청 상태일 때만 가져간다 - 두 평가사가 동시에 눌러도 한 명만 배정된다
+        answer_dates = _answer_dates(conn, "id = ?", (diagnosis_id,))
+        if not transition_status(
+            conn, [diagnosis_id], "평가사배정", expected=["신청"],
+            evaluator_id=evaluator_id, evaluator_name=evaluator_name,
+        ):
+            return False
+        refresh_settlement_days(conn, answer_dates)
+        return True
+
+    if not db_writer.run(assign):
+        return _status_conflict(diagnosis_id, "평가사배정", "이미 다른 평가사가 배정된 진단입니다.")
     return jsonify(success=True)
 
 
@@ -1492,13 +2640,8 @@ def evaluator_complete():
     if not diagnosis_id:
         return jsonify(success=False, message="잘못된 요청입니다.")
 
-    db = get_db()
-    db.execute(
-        "UPDATE diagnosis_requests SET status = '평가완료' WHERE id = ?",
-        (diagnosis_id,),
-    )
-    db.commit()
-
+    if not db_writer.run(lambda conn: transition_status(conn, [diagnosis_id], "평가완료")):
+        return _status_conflict(diagnosis_id, "평가완료")
     return jsonify(success=True)
 
 
@@ -1518,25 +2661,13 @@ def evaluator_response():
         ORDER BY dr.request_date DESC
         """,
         [session["user_id"], session["user_id"]] + params,
-    ).fetchall()
-
-    enriched = []
-    for row in rows:
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        enriched.append(
-            {
-                "row": row,
-                "request_summary": _summarize_details(details, "content"),
-                "response_summary": _summarize_details(responses, "content"),
-            }
-        )
+    )
 
     start_date = request.args.get("start_date", "")
     end_date = request.args.get("end_date", "")
-    return render_template(
+    return _stream_page(
         "evaluator/response.html",
-        requests=enriched,
+        requests=_iter_cursor(rows),
         start_date=start_date,
         end_date=end_date,
     )
@@ -1561,6 +2692,7 @@ def evaluator_response_form(diagnosis_id: int):
                 """,
                 (diagnosis_id, idx, default_item),
             )
+        refresh_detail_summaries(db, [diagnosis_id])
         db.commit()
         details = _fetch_request_details(diagnosis_id)
 
@@ -1593,6 +2725,7 @@ def evaluator_response_form_json(diagnosis_id: int):
                 """,
                 (diagnosis_id, idx, default_item),
             )
+        refresh_detail_summaries(db, [diagnosis_id])
         db.commit()
         details = _fetch_request_details(diagnosis_id)
 
@@ -1619,23 +2752,48 @@ def evaluator_response_form_json(diagnosis_id: int):
             "lot_number": diagnosis["lot_number"] or "",
             "parking_number": diagnosis["parking_number"] or "",
             "evaluator_name": diagnosis["evaluator_name"] or "",
+            "version": diagnosis["version"],
         },
         table_data=table_data,
     )
 
 
+class StatusConflict(Exception):
+    """진단의 현재 상태에서 요청한 상태로 바꿀 수 없다."""
+
+    def __init__(self, target: str) -> None:
+        super().__init__(f"status conflict (target={target})")
+        self.target = target
+
+
+class VersionConflict(Exception):
+    """저장하려는 진단의 version 이 그 사이 바뀌었다 (다른 사람이 먼저 저장함)."""
+
+    def __init__(self, current_version: Optional[int]) -> None:
+        super().__init__(f"version conflict (current={current_version})")
+        self.current_version = current_version
+
+
 @app.route("/evaluator/response/save", methods=["POST"])
 @login_required
 @role_required("평가사")
 def evaluator_response_save():
+    """
+    답변을 한 번의 UPSERT 로 저장한다. 요청의 version 이 현재 진단의 version 과 같을 때만 저장하고
+    version 을 올린다. 그 사이 다른 사람이 저장했으면 409 를 돌려 덮어쓰지 않는다.
+    """
     data = request.get_json()
     diagnosis_id = data.get("diagnosis_id")
     details = data.get("details", [])
+    version = data.get("version")
 
     if not diagnosis_id:
         return jsonify(success=False, message="잘못된 요청입니다.")
+    if not isinstance(version, int):
+        return jsonify(success=False, message="페이지를 새로고침한 뒤 다시 저장해주세요."), 400
 
-    db = get_db()
+    responder_id = session["user_id"]
+    rows = []
     for detail in details:
         seq = detail.get("sequence")
         content = detail.get("content", "").strip()
@@ -1643,24 +2801,59 @@ def evaluator_response_save():
 
         if not content:
             continue
+        rows.append((diagnosis_id, responder_id, seq, content, note))
 
-        db.execute(
+    def save(conn: sqlite3.Connection) -> int:
+        answer_dates = _answer_dates(conn, "id = ?", (diagnosis_id,))
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        updated = conn.execute(
+            """
+            UPDATE diagnosis_requests
+            SET answer_date = ?, version = version + 1
+            WHERE id = ? AND version = ?
+            """,
+            (now, diagnosis_id, version),
+        ).rowcount
+        if not updated:
+            current = conn.execute(
+                "SELECT version FROM diagnosis_requests WHERE id = ?", (diagnosis_id,)
+            ).fetchone()
+            raise VersionConflict(current["version"] if current else None)
+        if not transition_status(conn, [diagnosis_id], "답변완료"):
+            raise StatusConflict("답변완료")
+        # 내용이 바뀐 항목만 고친다 (행을 지우고 다시 넣지 않으므로 id 와 created_at 이 유지된다)
+        conn.executemany(
             """
-            INSERT OR REPLACE INTO diagnosis_response_details
+            INSERT INTO diagnosis_response_details
             (diagnosis_id, responder_id, sequence, content, note, updated_at)
             VALUES (?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(diagnosis_id, sequence) DO UPDATE SET
+                responder_id = excluded.responder_id,
+                content = excluded.content,
+                note = excluded.note,
+                updated_at = excluded.updated_at
+            WHERE diagnosis_response_details.content IS NOT excluded.content
+               OR diagnosis_response_details.note IS NOT excluded.note
             """,
-            (diagnosis_id, session["user_id"], seq, content, note),
+            rows,
         )
+        refresh_detail_summaries(conn, [diagnosis_id])
+        refresh_settlement_days(conn, answer_dates + [now])
+        return version + 1
 
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    db.execute(
-        "UPDATE diagnosis_requests SET answer_date = ?, status = '답변완료' WHERE id = ?",
-        (now, diagnosis_id),
-    )
-    db.commit()
-
-    return jsonify(success=True, message="저장되었습니다.")
+    try:
+        new_version = db_writer.run(save)
+    except VersionConflict as e:
+        if e.current_version is None:
+            return jsonify(success=False, message="진단신청을 찾을 수 없습니다."), 404
+        return jsonify(
+            success=False,
+            message="다른 평가사가 먼저 답변을 저장했습니다. 최신 내용을 다시 불러옵니다.",
+            version=e.current_version,
+        ), 409
+    except StatusConflict as e:
+        return _status_conflict(diagnosis_id, e.target)
+    return jsonify(success=True, message="저장되었습니다.", version=new_version)
 
 
 @app.route("/evaluator/response/history")
@@ -1681,25 +2874,13 @@ def evaluator_response_history():
         ORDER BY dr.request_date DESC
         """,
         [session["user_id"], session["user_id"]] + params,
-    ).fetchall()
-
-    enriched = []
-    for row in rows:
-        details = _fetch_request_details(row["id"])
-        responses = _fetch_response_details(row["id"])
-        enriched.append(
-            {
-                "row": row,
-                "request_summary": _summarize_details(details, "content"),
-                "response_summary": _summarize_details(responses, "content"),
-            }
-        )
+    )
 
     start_date = request.args.get("start_date", "")
     end_date = request.args.get("end_date", "")
-    return render_template(
+    return _stream_page(
         "evaluator/response_history.html",
-        requests=enriched,
+        requests=_iter_cursor(rows),
         start_date=start_date,
         end_date=end_date,
     )
@@ -1716,28 +2897,21 @@ def evaluator_response_confirm():
         return jsonify(success=False, message="잘못된 요청입니다.")
 
     db = get_db()
+    answer_dates = _answer_dates(db, "id = ?", (diagnosis_id,))
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    db.execute(
-        "UPDATE diagnosis_requests SET status = '답변완료', answer_date = ? WHERE id = ?",
-        (now, diagnosis_id),
-    )
+    if not transition_status(db, [diagnosis_id], "답변완료", answer_date=now):
+        db.rollback()
+        return _status_conflict(diagnosis_id, "답변완료")
+    refresh_settlement_days(db, answer_dates + [now])
     db.commit()
 
     return jsonify(success=True)
 
 
-@app.route("/evaluator/response/export/<string:fmt>")
-@login_required
-@role_required("평가사")
-def evaluator_response_export(fmt: str):
-    if fmt not in ("xlsx", "pdf"):
-        abort(404)
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-    if not start_date or not end_date:
-        return redirect(url_for("evaluator_response"))
-
-    clause, params = _filter_clause("dr.request_date")
+def _evaluator_response_export_spec(
+    user_id: int, start_date: str, end_date: str
+) -> Tuple[List[str], Iterable[List[Any]]]:
+    clause, params = _date_range_clause("dr.request_date", start_date, end_date)
     db = get_db()
     rows = db.execute(
         f"""
@@ -1748,8 +2922,8 @@ def evaluator_response_export(fmt: str):
           {clause}
         ORDER BY dr.request_date DESC
         """,
-        [session["user_id"], session["user_id"]] + params,
-    ).fetchall()
+        [user_id, user_id] + params,
+    )
 
     headers = [
         "신청일",
@@ -1760,28 +2934,98 @@ def evaluator_response_export(fmt: str):
         "답변내역",
         "답변일",
     ]
-    data: List[List[Any]] = []
-    for row in rows:
-        request_details = _fetch_request_details(row["id"])
-        response_details = _fetch_response_details(row["id"])
-        data.append(
-            [
-                row["request_date"],
-                row["vehicle_number"],
-                row["lot_number"],
-                row["parking_number"],
-                _summarize_details(request_details, "content"),
-                _summarize_details(response_details, "content"),
-                row["answer_date"] or "",
-            ]
-        )
+    data = (
+        [
+            row["request_date"],
+            row["vehicle_number"],
+            row["lot_number"],
+            row["parking_number"],
+            row["request_summary"] or "",
+            row["response_summary"] or "",
+            row["answer_date"] or "",
+        ]
+        for row in _iter_cursor(rows)
+    )
+    return headers, data
 
-    filename = EXPORT_DIR / f"evaluator_response_{start_date}_{end_date}.{fmt}"
-    if fmt == "xlsx":
-        export_to_excel(data, headers, filename)
-    else:
-        export_to_pdf(data, headers, filename, title="평가답변")
-    return send_file(filename, as_attachment=True)
+
+def _evaluator_response_export_count(user_id: int, start_date: str, end_date: str) -> int:
+    clause, params = _date_range_clause("dr.request_date", start_date, end_date)
+    return get_db().execute(
+        f"""
+        SELECT COUNT(*) FROM diagnosis_requests dr
+        WHERE (dr.evaluator_id = ? OR dr.evaluator_name = (SELECT name FROM users WHERE id = ?))
+          {clause}
+        """,
+        [user_id, user_id] + params,
+    ).fetchone()[0]
+
+
+@app.route("/evaluator/response/export/<string:fmt>")
+@login_required
+@role_required("평가사")
+def evaluator_response_export(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    if not start_date or not end_date:
+        return redirect(url_for("evaluator_response"))
+
+    return _send_export(
+        _evaluator_response_export_spec,
+        {"user_id": session["user_id"], "start_date": start_date, "end_date": end_date},
+        fmt, f"evaluator_response_{start_date}_{end_date}", title="평가답변",
+    )
+
+
+# 백그라운드 내보내기 작업이 이름으로 찾는 spec 과, 인라인/작업 여부를 정하는 행 수 계산 함수
+EXPORT_SPECS: Dict[str, ExportSpec] = {
+    spec.__name__: spec
+    for spec in (
+        _diagnosis_detail_export_spec,
+        _admin_diagnosis_export_spec,
+        _settlement_export_spec,
+        _diagnosis_history_export_spec,
+        _evaluator_response_export_spec,
+    )
+}
+
+
+def _request_days_version(start_date: Optional[str] = None, end_date: Optional[str] = None, **_: Any) -> int:
+    """신청일 구간 내보내기의 데이터 버전 (구간을 주지 않으면 전체)."""
+    start = _parse_day(start_date)
+    end = _parse_day(end_date)
+    return data_version_range(
+        get_db(), "request", start.isoformat() if start else None, end.isoformat() if end else None
+    )
+
+
+def _diagnosis_detail_export_version(diagnosis_id: int) -> int:
+    row = get_db().execute(
+        "SELECT substr(request_date, 1, 10) AS day FROM diagnosis_requests WHERE id = ?", (diagnosis_id,)
+    ).fetchone()
+    if not row:
+        return _request_days_version()
+    return data_version_range(get_db(), "request", row["day"], row["day"])
+
+
+def _settlement_export_version(year: int, month: int) -> int:
+    first = date(year, month, 1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return data_version_range(get_db(), "settlement", first.isoformat(), last.isoformat())
+
+
+# 내보내기별 데이터 버전 (등록하지 않은 내보내기는 전체 신청일 구간의 버전을 쓴다)
+EXPORT_VERSIONS: Dict[str, Callable[..., int]] = {
+    _diagnosis_detail_export_spec.__name__: _diagnosis_detail_export_version,
+    _settlement_export_spec.__name__: _settlement_export_version,
+}
+EXPORT_ROW_COUNTS: Dict[str, Callable[..., int]] = {
+    _admin_diagnosis_export_spec.__name__: _admin_diagnosis_export_count,
+    _diagnosis_history_export_spec.__name__: _diagnosis_history_export_count,
+    _evaluator_response_export_spec.__name__: _evaluator_response_export_count,
+}
 
 
 if __name__ == "__main__":
@@ -6,26 +6,132 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
 from werkzeug.security import generate_password_hash
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 BASE_DIR = Path(__file__).resolve().parent
 DB_DIR = Path(os.environ.get("WECAR_DB_DIR", BASE_DIR / "data"))
 DB_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DB_DIR / "wecar_diagnosis.db"
 
 
-def get_connection() -> sqlite3.Connection:
+DB_POOL_SIZE = int(os.environ.get("WECAR_DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("WECAR_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.environ.get("WECAR_DB_CACHE_SIZE_KB", "16384"))
+
+
+def _configure_connection(conn: sqlite3.Connection) -> None:
     """
-    sqlite3 Connection 을 row factory 와 함께 반환한다.
+    모든 연결에 공통 PRAGMA 를 적용한다.
+    WAL 모드에서는 읽기가 쓰기를 기다리지 않고, busy_timeout 동안 잠금 해제를 기다린다.
     """
-    conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    설정이 적용된 새 sqlite3 Connection 을 row factory 와 함께 반환한다.
+    """
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+    )
+    _configure_connection(conn)
     return conn
 
 
+class ConnectionPool:
+    """
+    프로세스별 연결 풀. 반납된 연결을 최대 max_size 개까지 보관했다가 재사용한다.
+    fork 이후에는 부모 프로세스의 연결을 버리고 새로 연결한다.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self._check_pid()
+            if self._idle:
+                return self._idle.pop()
+        return get_connection()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pool = ConnectionPool(DB_POOL_SIZE)
+
+
+def acquire_connection() -> sqlite3.Connection:
+    """
+    풀에서 연결을 꺼낸다. 사용 후 release_connection 으로 반납해야 한다.
+    """
+    return _pool.acquire()
+
+
+def release_connection(conn: sqlite3.Connection) -> None:
+    """
+    연결을 풀에 반납한다. 커밋되지 않은 트랜잭션은 롤백된다.
+    """
+    _pool.release(conn)
+
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """
+    풀에서 연결을 빌려 with 블록이 끝나면 반납한다.
+    """
+    conn = acquire_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+
 def _has_column(cur: sqlite3.Cursor, table: str, column: str) -> bool:
     """
     테이블에 특정 컬럼이 있는지 확인한다.
@@ -34,17 +140,33 @@ def _has_column(cur: sqlite3.Cursor, table: str, column: str) -> bool:
     return any(row[1] == column for row in cur.fetchall())
 
 
-def init_db(seed_demo_data: bool = True) -> None:
+def _split_statements(script: str) -> List[str]:
     """
-    테이블 생성 및 기본 데이터 시드.
+    SQL 스크립트를 개별 문장으로 나눈다 (트리거 본문의 세미콜론도 고려).
     """
-    conn = get_connection()
-    cur = conn.cursor()
+    statements: List[str] = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    return statements
 
-    cur.executescript(
-        """
-        PRAGMA foreign_keys = ON;
 
+def _run_script(conn: sqlite3.Connection, script: str) -> None:
+    """
+    executescript 와 달리 현재 트랜잭션을 커밋하지 않고 문장을 실행한다.
+    """
+    for statement in _split_statements(script):
+        conn.execute(statement)
+
+
+def _migration_0001_base_schema(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_type TEXT NOT NULL,
@@ -112,14 +234,479 @@ def init_db(seed_demo_data: bool = True) -> None:
             payload TEXT NOT NULL,
             created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
         );
+        """,
+    )
+
+
+def _migration_0002_indexes(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_request_date
+            ON diagnosis_requests(request_date);
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_answer_date
+            ON diagnosis_requests(answer_date);
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_applicant
+            ON diagnosis_requests(applicant_id, request_date);
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_evaluator
+            ON diagnosis_requests(evaluator_id);
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_status
+            ON diagnosis_requests(status);
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_request_items_diagnosis
+            ON diagnosis_request_items(diagnosis_id, sequence);
+        CREATE INDEX IF NOT EXISTS idx_settlements_year_month
+            ON settlements(year, month);
+        """,
+    )
+
+
+def _migration_0003_detail_summaries(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+    if _has_column(cur, "diagnosis_requests", "request_summary"):
+        return
+    cur.execute("ALTER TABLE diagnosis_requests ADD COLUMN request_summary TEXT")
+    cur.execute("ALTER TABLE diagnosis_requests ADD COLUMN response_summary TEXT")
+    # 이미 배포된 마이그레이션이 뒤에 바뀌는 헬퍼를 따라가지 않도록 이 시점의 계산을 그대로 둔다.
+    # 신청 요약은 앞의 5개 항목, 답변 요약은 답변 전체에서 비어 있지 않은 내용 5개를 "/" 로 잇는다.
+    summaries: Dict[int, List[List[str]]] = {
+        row["id"]: [[], []] for row in cur.execute("SELECT id FROM diagnosis_requests")
+    }
+    seen_items: Dict[int, int] = {}
+    for row in cur.execute(
+        "SELECT diagnosis_id, content FROM diagnosis_request_items ORDER BY diagnosis_id, sequence ASC"
+    ):
+        diagnosis_id = row["diagnosis_id"]
+        if diagnosis_id not in summaries or seen_items.get(diagnosis_id, 0) >= 5:
+            continue
+        seen_items[diagnosis_id] = seen_items.get(diagnosis_id, 0) + 1
+        if row["content"]:
+            summaries[diagnosis_id][0].append(row["content"].strip())
+    for row in cur.execute(
+        """
+        SELECT d.diagnosis_id, d.content
+        FROM diagnosis_response_details d
+        JOIN users u ON u.id = d.responder_id
+        ORDER BY d.diagnosis_id, d.sequence ASC
         """
+    ):
+        if row["diagnosis_id"] in summaries and row["content"]:
+            summaries[row["diagnosis_id"]][1].append(row["content"].strip())
+    cur.executemany(
+        "UPDATE diagnosis_requests SET request_summary = ?, response_summary = ? WHERE id = ?",
+        [
+            ("/".join(request_parts[:5]), "/".join(response_parts[:5]), diagnosis_id)
+            for diagnosis_id, (request_parts, response_parts) in summaries.items()
+        ],
     )
 
-    if seed_demo_data:
-        _seed_users(cur)
 
-    conn.commit()
-    conn.close()
+def _migration_0004_settlement_daily(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        -- 일자/평가사별 답변 건수 롤업 (정산 화면용, refresh_settlement_days 로 유지)
+        CREATE TABLE IF NOT EXISTS settlement_daily (
+            day TEXT NOT NULL,
+            evaluator_name TEXT NOT NULL,
+            cnt INTEGER NOT NULL,
+            PRIMARY KEY (day, evaluator_name)
+        ) WITHOUT ROWID;
+
+        -- 이 시점의 집계 규칙으로 채운다 (배포된 마이그레이션은 헬퍼 변경을 따라가지 않는다)
+        INSERT INTO settlement_daily (day, evaluator_name, cnt)
+        SELECT date(dr.answer_date) AS day,
+               COALESCE(evaluator.name, dr.evaluator_name, '미지정') AS evaluator_name,
+               COUNT(*) AS cnt
+        FROM diagnosis_requests dr
+        LEFT JOIN users evaluator ON evaluator.id = dr.evaluator_id
+        WHERE dr.answer_date IS NOT NULL
+          AND dr.answer_date != ''
+        GROUP BY 1, 2
+        HAVING day IS NOT NULL;
+        """,
+    )
+
+
+def _migration_0005_translation_cache(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source_lang, target_lang, text_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used
+            ON translation_cache(last_used_at);
+        """,
+    )
+
+
+def _migration_0006_translation_jobs(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS translation_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            diagnosis_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            result TEXT,
+            error TEXT,
+            requested_by INTEGER,
+            created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            started_at TEXT,
+            finished_at TEXT,
+            FOREIGN KEY (diagnosis_id) REFERENCES diagnosis_requests(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_translation_jobs_diagnosis
+            ON translation_jobs(diagnosis_id, status);
+        """,
+    )
+
+
+def _migration_0007_diagnosis_translations(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        -- 항목(헤더/순번)과 필드별 번역. source_hash 가 원문과 같으면 다시 번역하지 않는다.
+        CREATE TABLE IF NOT EXISTS diagnosis_translations (
+            diagnosis_id INTEGER NOT NULL,
+            item_key TEXT NOT NULL,
+            field TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            PRIMARY KEY (diagnosis_id, item_key, field),
+            FOREIGN KEY (diagnosis_id) REFERENCES diagnosis_requests(id) ON DELETE CASCADE
+        );
+        """,
+    )
+    if not _has_column(conn.cursor(), "translation_jobs", "force_refresh"):
+        conn.execute("ALTER TABLE translation_jobs ADD COLUMN force_refresh INTEGER NOT NULL DEFAULT 0")
+
+
+def _migration_0008_email_outbox(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        -- 발송 대기 메일. 요청 처리와 같은 트랜잭션에서 쌓고 백그라운드 발송기가 보낸다.
+        -- status: queued -> sending -> sent, 재시도 한도를 넘으면 dead
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL DEFAULT 'general',
+            diagnosis_id INTEGER,
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body_html TEXT NOT NULL,
+            body_text TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            last_error TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            sent_at TEXT,
+            FOREIGN KEY (diagnosis_id) REFERENCES diagnosis_requests(id) ON DELETE SET NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+            ON email_outbox(status, next_attempt_at);
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_diagnosis
+            ON email_outbox(diagnosis_id, kind);
+        """,
+    )
+
+
+def _migration_0009_data_versions(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        INSERT OR IGNORE INTO data_versions (name, version) VALUES ('diagnosis', 0);
+        """,
+    )
+    # 내보내기 캐시 키에 들어가는 데이터 버전. 아래 테이블이 바뀌면 트리거가 올린다.
+    for table in ("users", "diagnosis_requests", "diagnosis_request_items", "diagnosis_response_details"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE name = 'diagnosis';
+                END
+                """
+            )
+
+
+def _migration_0010_export_jobs(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        -- 행이 많은 xlsx/pdf 내보내기를 백그라운드에서 만드는 작업. 결과 파일은 내보내기 캐시에 둔다.
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            spec TEXT NOT NULL,
+            params TEXT NOT NULL,
+            fmt TEXT NOT NULL,
+            title TEXT NOT NULL,
+            download_name TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            rows_total INTEGER,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            requested_by INTEGER,
+            created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            started_at TEXT,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_export_jobs_cache_key
+            ON export_jobs(cache_key, status);
+        """,
+    )
+
+
+def _migration_0011_diagnosis_version(conn: sqlite3.Connection) -> None:
+    # 답변 저장 시 낙관적 동시성 검사용. 답변을 저장할 때마다 1 씩 올라간다.
+    if not _has_column(conn.cursor(), "diagnosis_requests", "version"):
+        conn.execute("ALTER TABLE diagnosis_requests ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+# 진단 상태 (코드, 이름). 코드는 diagnosis_requests.status_code 에 저장하고 조건/인덱스에 쓴다.
+# 이름은 화면과 내보내기용으로 status 컬럼에 함께 기록한다 (항상 transition_status 로 같이 바꾼다).
+DIAGNOSIS_STATUSES: List[Tuple[int, str]] = [
+    (0, "신청"),
+    (1, "평가사배정"),
+    (2, "답변완료"),
+    (3, "평가완료"),
+    (4, "전송완료"),
+]
+STATUS_CODES: Dict[str, int] = {name: code for code, name in DIAGNOSIS_STATUSES}
+STATUS_NAMES: Dict[int, str] = {code: name for code, name in DIAGNOSIS_STATUSES}
+
+# 현재 상태 -> 바꿀 수 있는 상태. 같은 상태로의 전이는 재배정/재저장/재전송을 뜻한다.
+ALLOWED_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "신청": frozenset({"평가사배정"}),
+    "평가사배정": frozenset({"평가사배정", "평가완료", "답변완료", "신청"}),
+    "평가완료": frozenset({"답변완료", "전송완료"}),
+    "답변완료": frozenset({"답변완료", "전송완료"}),
+    "전송완료": frozenset({"전송완료", "답변완료"}),
+}
+# 전송완료는 결과 메일이 실제로 전송됐을 때(_mark_diagnosis_sent)만 바뀐다. 화면에서 고르는 상태에서는 뺀다.
+SYSTEM_ONLY_STATUSES: FrozenSet[str] = frozenset({"전송완료"})
+# 관리자 정정: 현재 상태와 관계없이 바꿀 수 있는 상태
+ADMIN_CORRECTION_TARGETS: FrozenSet[str] = frozenset(STATUS_CODES) - SYSTEM_ONLY_STATUSES
+
+
+def _migration_0012_status_codes(conn: sqlite3.Connection) -> None:
+    _run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS diagnosis_statuses (
+            code INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        """,
+    )
+    # 이 시점의 상태 목록을 그대로 넣는다 (DIAGNOSIS_STATUSES 가 바뀌면 새 마이그레이션으로 반영한다)
+    conn.executemany(
+        "INSERT OR IGNORE INTO diagnosis_statuses (code, name) VALUES (?, ?)",
+        [(0, "신청"), (1, "평가사배정"), (2, "답변완료"), (3, "평가완료"), (4, "전송완료")],
+    )
+    if not _has_column(conn.cursor(), "diagnosis_requests", "status_code"):
+        conn.execute("ALTER TABLE diagnosis_requests ADD COLUMN status_code INTEGER NOT NULL DEFAULT 0")
+    # 목록에 없는 옛 상태 문자열은 '신청' 으로 맞춘다
+    _run_script(
+        conn,
+        """
+        UPDATE diagnosis_requests
+        SET status_code = COALESCE((SELECT code FROM diagnosis_statuses WHERE name = diagnosis_requests.status), 0);
+        UPDATE diagnosis_requests
+        SET status = (SELECT name FROM diagnosis_statuses WHERE code = diagnosis_requests.status_code)
+        WHERE status NOT IN (SELECT name FROM diagnosis_statuses);
+        DROP INDEX IF EXISTS idx_diagnosis_requests_status;
+        CREATE INDEX IF NOT EXISTS idx_diagnosis_requests_status_code
+            ON diagnosis_requests(status_code);
+        """,
+    )
+
+
+def _bump_version_sql(prefix: str, day_expr: str) -> str:
+    """'<prefix>:<일자>' 데이터 버전을 올리는 트리거 문장 (없으면 1 로 만든다). 마이그레이션 13 전용."""
+    return f"""
+        INSERT INTO data_versions (name, version)
+        VALUES ('{prefix}:' || COALESCE(substr({day_expr}, 1, 10), ''), 1)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1;
+    """
+
+
+def _migration_0013_keyed_data_versions(conn: sqlite3.Connection) -> None:
+    """
+    전역 'diagnosis' 버전 하나를 모든 쓰기에서 올리던 트리거를 일자별 버전으로 바꾼다.
+    진단 관련 변경은 신청일별 'request:<일자>', 정산 롤업 변경은 'settlement:<일자>' 를 올리고,
+    전역 버전은 모든 내보내기에 나오는 사용자 이름이 바뀔 때만 올린다.
+    내보내기가 읽는 컬럼이 늘면 이 마이그레이션을 고치지 않고 새 마이그레이션에서 트리거를 다시 만든다.
+    """
+    for table in ("users", "diagnosis_requests", "diagnosis_request_items", "diagnosis_response_details"):
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{event}_version")
+
+    # 내보내기가 읽는 diagnosis_requests 컬럼. 이 컬럼이 바뀔 때만 해당 신청일의 데이터 버전을 올린다.
+    exported_columns = (
+        "applicant_id", "request_date", "status", "vehicle_number", "lot_number", "parking_number",
+        "evaluator_id", "evaluator_name", "answer_date", "confirmed_at", "sent_at",
+        "request_summary", "response_summary",
+    )
+    parent_day = "(SELECT request_date FROM diagnosis_requests WHERE id = {row}.diagnosis_id)"
+    triggers = {
+        "trg_users_name_data_version": (
+            "AFTER UPDATE OF name ON users",
+            "UPDATE data_versions SET version = version + 1 WHERE name = 'diagnosis';",
+        ),
+        "trg_diagnosis_requests_insert_data_version": (
+            "AFTER INSERT ON diagnosis_requests",
+            _bump_version_sql("request", "NEW.request_date"),
+        ),
+        "trg_diagnosis_requests_update_data_version": (
+            f"AFTER UPDATE OF {', '.join(exported_columns)} ON diagnosis_requests",
+            _bump_version_sql("request", "OLD.request_date") + _bump_version_sql("request", "NEW.request_date"),
+        ),
+        "trg_diagnosis_requests_delete_data_version": (
+            "AFTER DELETE ON diagnosis_requests",
+            _bump_version_sql("request", "OLD.request_date"),
+        ),
+        "trg_settlement_daily_insert_data_version": (
+            "AFTER INSERT ON settlement_daily",
+            _bump_version_sql("settlement", "NEW.day"),
+        ),
+        "trg_settlement_daily_update_data_version": (
+            "AFTER UPDATE ON settlement_daily",
+            _bump_version_sql("settlement", "OLD.day") + _bump_version_sql("settlement", "NEW.day"),
+        ),
+        "trg_settlement_daily_delete_data_version": (
+            "AFTER DELETE ON settlement_daily",
+            _bump_version_sql("settlement", "OLD.day"),
+        ),
+    }
+    for table, columns in (
+        ("diagnosis_request_items", "sequence, content"),
+        ("diagnosis_response_details", "sequence, content, note"),
+    ):
+        triggers[f"trg_{table}_insert_data_version"] = (
+            f"AFTER INSERT ON {table}",
+            _bump_version_sql("request", parent_day.format(row="NEW")),
+        )
+        triggers[f"trg_{table}_update_data_version"] = (
+            f"AFTER UPDATE OF {columns} ON {table}",
+            _bump_version_sql("request", parent_day.format(row="NEW")),
+        )
+        triggers[f"trg_{table}_delete_data_version"] = (
+            f"AFTER DELETE ON {table}",
+            _bump_version_sql("request", parent_day.format(row="OLD")),
+        )
+    for name, (when, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {when} BEGIN {body} END")
+
+
+def _migration_0014_database_id(conn: sqlite3.Connection) -> None:
+    """
+    DB 마다 임의의 식별값을 data_versions 에 남긴다. 데이터 버전은 새 DB 에서 같은 값부터 다시 세므로
+    내보내기 캐시 키에 이 값을 함께 넣어 이전 DB 로 만든 파일이 새 DB 에 쓰이지 않게 한다.
+    """
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('database_id', random())")
+
+
+# (버전, 마이그레이션) 목록. 적용된 마지막 버전은 PRAGMA user_version 에 기록된다.
+# 새 마이그레이션은 항상 끝에 추가하고, 이미 배포된 항목은 수정하지 않는다.
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migration_0001_base_schema),
+    (2, _migration_0002_indexes),
+    (3, _migration_0003_detail_summaries),
+    (4, _migration_0004_settlement_daily),
+    (5, _migration_0005_translation_cache),
+    (6, _migration_0006_translation_jobs),
+    (7, _migration_0007_diagnosis_translations),
+    (8, _migration_0008_email_outbox),
+    (9, _migration_0009_data_versions),
+    (10, _migration_0010_export_jobs),
+    (11, _migration_0011_diagnosis_version),
+    (12, _migration_0012_status_codes),
+    (13, _migration_0013_keyed_data_versions),
+    (14, _migration_0014_database_id),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """
+    데이터베이스에 기록된 스키마 버전(PRAGMA user_version)을 반환한다.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+@contextmanager
+def _migration_lock() -> Iterator[None]:
+    """
+    여러 워커가 동시에 시작해도 마이그레이션은 한 프로세스만 실행하도록 파일 잠금을 건다.
+    fcntl 이 없는 환경에서는 BEGIN IMMEDIATE 와 버전 재확인에 맡긴다.
+    """
+    lock_path = DB_DIR / f"{DB_PATH.name}.migrate.lock"
+    with open(lock_path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """
+    아직 적용되지 않은 마이그레이션을 버전 순서대로 각각 하나의 트랜잭션으로 실행한다.
+    """
+    applied: List[int] = []
+    for version, migration in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(version)
+    return applied
+
+
+def init_db(seed_demo_data: bool = True) -> None:
+    """
+    스키마를 최신 버전으로 올리고 기본 데이터를 시드한다.
+    이미 최신이면 버전만 확인하고 바로 반환한다.
+    """
+    with connection() as conn:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return
+
+    conn = get_connection()
+    try:
+        with _migration_lock():
+            applied = _apply_migrations(conn)
+            if applied and seed_demo_data:
+                _seed_users(conn.cursor())
+                conn.commit()
+    finally:
+        conn.close()
 
 
 def _seed_users(cur: sqlite3.Cursor) -> None:
@@ -154,8 +741,277 @@ def _seed_users(cur: sqlite3.Cursor) -> None:
         )
 
 
+SUMMARY_CHUNK_SIZE = 500
+
+
+def summarize_details(rows: Iterable[sqlite3.Row], field: str) -> str:
+    """
+    상세 항목들의 내용을 앞에서부터 5개까지 "/" 로 이어 붙인다.
+    """
+    parts: List[str] = []
+    for row in rows:
+        value = row[field]
+        if not value:
+            continue
+        parts.append(value.strip())
+    return "/".join(parts[:5])
+
+
+def fetch_detail_summaries(conn: sqlite3.Connection, diagnosis_ids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+    """
+    여러 진단신청의 신청/답변 요약을 한 번에 계산한다.
+    진단신청 건수와 관계없이 청크당 두 번의 쿼리만 실행한다.
+    """
+    ids = list(dict.fromkeys(diagnosis_ids))
+    request_rows: Dict[int, List[sqlite3.Row]] = {diagnosis_id: [] for diagnosis_id in ids}
+    response_rows: Dict[int, List[sqlite3.Row]] = {diagnosis_id: [] for diagnosis_id in ids}
+
+    for offset in range(0, len(ids), SUMMARY_CHUNK_SIZE):
+        chunk = ids[offset:offset + SUMMARY_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in conn.execute(
+            f"""
+            SELECT diagnosis_id, content FROM diagnosis_request_items
+            WHERE diagnosis_id IN ({placeholders})
+            ORDER BY diagnosis_id, sequence ASC
+            """,
+            chunk,
+        ):
+            items = request_rows[row["diagnosis_id"]]
+            # 단건 조회(_fetch_request_details)와 동일하게 앞의 5개 항목만 사용한다.
+            if len(items) < 5:
+                items.append(row)
+        for row in conn.execute(
+            f"""
+            SELECT d.diagnosis_id, d.content
+            FROM diagnosis_response_details d
+            JOIN users u ON u.id = d.responder_id
+            WHERE d.diagnosis_id IN ({placeholders})
+            ORDER BY d.diagnosis_id, d.sequence ASC
+            """,
+            chunk,
+        ):
+            response_rows[row["diagnosis_id"]].append(row)
+
+    return {
+        diagnosis_id: {
+            "request_summary": summarize_details(request_rows[diagnosis_id], "content"),
+            "response_summary": summarize_details(response_rows[diagnosis_id], "content"),
+        }
+        for diagnosis_id in ids
+    }
+
+
+def fetch_detail_rows(
+    conn: sqlite3.Connection, diagnosis_ids: Iterable[int]
+) -> Dict[int, Tuple[List[sqlite3.Row], List[sqlite3.Row]]]:
+    """
+    여러 진단신청의 (신청 항목, 답변) 행을 한 번에 읽는다. 청크당 두 번의 쿼리만 실행한다.
+    단건 조회(_fetch_request_details/_fetch_response_details)와 같은 열과 순서를 돌려준다.
+    """
+    ids = list(dict.fromkeys(diagnosis_ids))
+    request_rows: Dict[int, List[sqlite3.Row]] = {diagnosis_id: [] for diagnosis_id in ids}
+    response_rows: Dict[int, List[sqlite3.Row]] = {diagnosis_id: [] for diagnosis_id in ids}
+
+    for offset in range(0, len(ids), SUMMARY_CHUNK_SIZE):
+        chunk = ids[offset:offset + SUMMARY_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in conn.execute(
+            f"""
+            SELECT * FROM diagnosis_request_items
+            WHERE diagnosis_id IN ({placeholders})
+            ORDER BY diagnosis_id, sequence ASC
+            """,
+            chunk,
+        ):
+            items = request_rows[row["diagnosis_id"]]
+            if len(items) < 5:
+                items.append(row)
+        for row in conn.execute(
+            f"""
+            SELECT d.*, u.name AS responder_name
+            FROM diagnosis_response_details d
+            JOIN users u ON u.id = d.responder_id
+            WHERE d.diagnosis_id IN ({placeholders})
+            ORDER BY d.diagnosis_id, d.sequence ASC
+            """,
+            chunk,
+        ):
+            response_rows[row["diagnosis_id"]].append(row)
+
+    return {diagnosis_id: (request_rows[diagnosis_id], response_rows[diagnosis_id]) for diagnosis_id in ids}
+
+
+def refresh_detail_summaries(conn: sqlite3.Connection, diagnosis_ids: Iterable[int]) -> None:
+    """
+    diagnosis_requests 의 request_summary / response_summary 컬럼을 다시 계산한다.
+    신청 항목이나 답변을 변경한 트랜잭션 안에서 호출한다 (커밋은 호출자가 한다).
+    """
+    summaries = fetch_detail_summaries(conn, diagnosis_ids)
+    conn.executemany(
+        "UPDATE diagnosis_requests SET request_summary = ?, response_summary = ? WHERE id = ?",
+        [
+            (summary["request_summary"], summary["response_summary"], diagnosis_id)
+            for diagnosis_id, summary in summaries.items()
+        ],
+    )
+
+
+UNASSIGNED_EVALUATOR = "미지정"
+
+_SETTLEMENT_ROLLUP_SELECT = """
+    SELECT date(dr.answer_date) AS day,
+           COALESCE(evaluator.name, dr.evaluator_name, ?) AS evaluator_name,
+           COUNT(*) AS cnt
+    FROM diagnosis_requests dr
+    LEFT JOIN users evaluator ON evaluator.id = dr.evaluator_id
+    WHERE dr.answer_date IS NOT NULL
+      AND dr.answer_date != ''
+      {clause}
+    GROUP BY 1, 2
+    HAVING day IS NOT NULL
+"""
+
+
+def refresh_settlement_days(conn: sqlite3.Connection, answer_dates: Iterable[Optional[str]]) -> None:
+    """
+    주어진 답변일(일자)에 해당하는 settlement_daily 행을 원본 데이터로 다시 집계한다.
+    답변일이나 평가사를 바꾸는 트랜잭션 안에서 변경 전/후 답변일을 모두 넘겨 호출한다.
+    """
+    days = sorted({value[:10] for value in answer_dates if value})
+    for day in days:
+        try:
+            next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        except ValueError:
+            continue
+        conn.execute("DELETE FROM settlement_daily WHERE day = ?", (day,))
+        conn.execute(
+            "INSERT INTO settlement_daily (day, evaluator_name, cnt) "
+            + _SETTLEMENT_ROLLUP_SELECT.format(clause="AND dr.answer_date >= ? AND dr.answer_date < ?"),
+            (UNASSIGNED_EVALUATOR, day, next_day),
+        )
+
+
+def rebuild_settlement_daily(conn: sqlite3.Connection) -> None:
+    """
+    settlement_daily 전체를 원본 데이터로부터 다시 만든다.
+    """
+    conn.execute("DELETE FROM settlement_daily")
+    conn.execute(
+        "INSERT INTO settlement_daily (day, evaluator_name, cnt) "
+        + _SETTLEMENT_ROLLUP_SELECT.format(clause=""),
+        (UNASSIGNED_EVALUATOR,),
+    )
+
+
+def fetch_settlement_daily(conn: sqlite3.Connection, start_date: str, end_date: str) -> List[sqlite3.Row]:
+    """
+    [start_date, end_date) 구간의 일자/평가사별 건수를 반환한다.
+    """
+    return conn.execute(
+        """
+        SELECT day, evaluator_name, cnt FROM settlement_daily
+        WHERE day >= ? AND day < ?
+        ORDER BY day ASC, evaluator_name ASC
+        """,
+        (start_date, end_date),
+    ).fetchall()
+
+
+def data_version(conn: sqlite3.Connection, name: str = "diagnosis") -> int:
+    """
+    트리거가 올리는 데이터 버전. 값이 같으면 그 사이 관련 테이블이 바뀌지 않은 것이다.
+    """
+    row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    return row["version"] if row else 0
+
+
+def database_id(conn: sqlite3.Connection) -> int:
+    """마이그레이션 14 가 DB 를 만들 때 정한 식별값 (DB 를 새로 만들면 달라진다)."""
+    return data_version(conn, "database_id")
+
+
+def data_version_range(
+    conn: sqlite3.Connection, prefix: str, start_day: Optional[str] = None, end_day: Optional[str] = None
+) -> int:
+    """
+    [start_day, end_day] 일자의 '<prefix>:<일자>' 버전 합에 전역 버전을 더한 값.
+    각 버전은 올라가기만 하므로 구간 안에서 무엇이든 바뀌면 값이 커진다 (구간 밖의 쓰기는 영향이 없다).
+    일자를 주지 않으면 그쪽으로 열린 구간이다.
+    """
+    row = conn.execute(
+        "SELECT COALESCE(SUM(version), 0) FROM data_versions WHERE name >= ? AND name <= ?",
+        (f"{prefix}:{start_day or ''}", f"{prefix}:{end_day or '~'}"),
+    ).fetchone()
+    return data_version(conn) + row[0]
+
+
+def can_transition(current: Optional[str], target: str) -> bool:
+    return target in ALLOWED_TRANSITIONS.get(current or "", ())
+
+
+def transition_sources(target: str, admin: bool = False) -> List[str]:
+    """target 으로 바꿀 수 있는 현재 상태 목록 (admin=True 이면 관리자 정정 포함)."""
+    if admin and target in ADMIN_CORRECTION_TARGETS:
+        return list(STATUS_CODES)
+    return [name for name, targets in ALLOWED_TRANSITIONS.items() if target in targets]
+
+
+def editable_statuses(current: Optional[str], admin: bool = False) -> List[str]:
+    """수정 화면에서 고를 수 있는 상태 (현재 상태 포함, DIAGNOSIS_STATUSES 순서)."""
+    targets = ADMIN_CORRECTION_TARGETS if admin else ALLOWED_TRANSITIONS.get(current or "", frozenset())
+    return [
+        name for _, name in DIAGNOSIS_STATUSES
+        if name == current or (name in targets and name not in SYSTEM_ONLY_STATUSES)
+    ]
+
+
+def transition_status(
+    conn: sqlite3.Connection,
+    diagnosis_ids: Iterable[int],
+    target: str,
+    expected: Optional[Iterable[str]] = None,
+    admin: bool = False,
+    **fields: Any,
+) -> List[int]:
+    """
+    진단들의 상태를 target 으로 바꾸고 실제로 바뀐 id 목록을 반환한다.
+    현재 상태가 expected(주지 않으면 target 으로 갈 수 있는 모든 상태) 중 하나일 때만 바꾸는
+    UPDATE ... WHERE id IN (...) AND status_code IN (...) 한 번으로 처리하므로(compare-and-swap),
+    동시에 들어온 전이는 하나만 성공하고 나머지는 반환 목록에서 빠진다.
+    admin=True 이면 ADMIN_CORRECTION_TARGETS 로의 관리자 정정을 어느 상태에서든 허용한다.
+    fields 는 같은 UPDATE 에서 함께 바꿀 컬럼이다. 커밋은 호출자가 한다.
+    전송완료에서 다른 상태로 정정되는 행은 sent_at 도 함께 비워 다시 전송할 수 있게 한다.
+    """
+    if target not in STATUS_CODES:
+        raise ValueError(f"알 수 없는 상태: {target}")
+    ids = list(diagnosis_ids)
+    sources = transition_sources(target, admin)
+    if expected is not None:
+        sources = [name for name in expected if name in sources]
+    if not ids or not sources:
+        return []
+    assignments = ["status_code = ?", "status = ?"] + [f"{column} = ?" for column in fields]
+    values: List[Any] = [STATUS_CODES[target], target, *fields.values()]
+    if target != "전송완료" and "전송완료" in sources and "sent_at" not in fields:
+        # 행마다 이전 상태가 다를 수 있으므로(일괄 정정) 전송완료였던 행만 비운다
+        assignments.append("sent_at = CASE WHEN status_code = ? THEN NULL ELSE sent_at END")
+        values.append(STATUS_CODES["전송완료"])
+    id_marks = ",".join("?" * len(ids))
+    code_marks = ",".join("?" * len(sources))
+    rows = conn.execute(
+        f"""
+        UPDATE diagnosis_requests SET {", ".join(assignments)}
+        WHERE id IN ({id_marks}) AND status_code IN ({code_marks})
+        RETURNING id
+        """,
+        [*values, *ids, *(STATUS_CODES[name] for name in sources)],
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
 def list_users() -> Iterable[sqlite3.Row]:
-    with get_connection() as conn:
+    with connection() as conn:
         return conn.execute(
             "SELECT * FROM users ORDER BY created_at DESC"
         ).fetchall()
@@ -165,7 +1021,7 @@ def save_settlement_payload(year: int, month: int, title: str, start_date: str,
     """
     정산 데이터를 저장하고 식별자를 반환한다.
     """
-    with get_connection() as conn:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -179,7 +1035,7 @@ def save_settlement_payload(year: int, month: int, title: str, start_date: str,
 
 
 def fetch_settlement(settlement_id: int) -> Optional[sqlite3.Row]:
-    with get_connection() as conn:
+    with connection() as conn:
         return conn.execute(
             "SELECT * FROM settlements WHERE id = ?", (settlement_id,)
         ).fetchone()
@@ -188,11 +1044,57 @@ def fetch_settlement(settlement_id: int) -> Optional[sqlite3.Row]:
 __all__ = [
     "DB_PATH",
     "get_connection",
+    "acquire_connection",
+    "release_connection",
+    "connection",
     "init_db",
+    "schema_version",
+    "SCHEMA_VERSION",
     "list_users",
     "save_settlement_payload",
     "fetch_settlement",
+    "fetch_detail_summaries",
+    "fetch_detail_rows",
+    "refresh_detail_summaries",
+    "summarize_details",
+    "refresh_settlement_days",
+    "rebuild_settlement_daily",
+    "fetch_settlement_daily",
+    "data_version",
+    "data_version_range",
+    "database_id",
+    "DIAGNOSIS_STATUSES",
+    "STATUS_CODES",
+    "STATUS_NAMES",
+    "ALLOWED_TRANSITIONS",
+    "SYSTEM_ONLY_STATUSES",
+    "ADMIN_CORRECTION_TARGETS",
+    "can_transition",
+    "editable_statuses",
+    "transition_sources",
+    "transition_status",
 ]
 
 
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="위카아라이 진단시스템 데이터베이스 관리")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="init",
+        choices=["init", "rebuild-settlements"],
+        help="init: 스키마 생성/갱신, rebuild-settlements: 정산 롤업 재생성",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "rebuild-settlements":
+        with connection() as conn:
+            rebuild_settlement_daily(conn)
+            conn.commit()
+        print("settlement_daily 롤업을 다시 만들었습니다.")
+
+
 
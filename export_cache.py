@@ -0,0 +1,166 @@
+"""
+내보내기 파일 캐시.
+
+(내보내기 종류, 파라미터, 형식, 데이터 버전, DB 식별값) 을 해시한 이름으로 EXPORT_DIR/cache 에 파일을 둔다.
+같은 키를 동시에 요청하면 한 번만 만들고 나머지는 그 결과를 기다린다.
+전체 크기와 마지막 사용 시각을 기준으로 오래된 파일부터 지운다.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple
+
+EXPORT_CACHE_MAX_BYTES = int(float(os.environ.get("WECAR_EXPORT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+EXPORT_CACHE_MAX_AGE_SECONDS = float(os.environ.get("WECAR_EXPORT_CACHE_MAX_AGE_HOURS", "24")) * 3600
+TMP_SUFFIX = ".tmp"
+
+
+class ExportCache:
+    """
+    파일 이름이 곧 캐시 키인 디스크 캐시. 적중하면 파일의 mtime 을 갱신해 LRU 순서로 쓴다.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+                 max_age_seconds: float = EXPORT_CACHE_MAX_AGE_SECONDS) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        # 키별 생성 잠금과 참조 수
+        self._key_locks: Dict[str, List[Any]] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(name: str, params: Dict[str, Any], fmt: str, version: int, database_id: int) -> str:
+        raw = json.dumps([name, params, fmt, version, database_id], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        return self.directory / f"{key}.{fmt}"
+
+    def _acquire_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key_lock(self, key: str) -> None:
+        with self._lock:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._key_locks[key]
+
+    def _open_hit(self, path: Path):
+        """캐시 파일을 열고 사용 시각을 갱신한다. 없으면 None."""
+        try:
+            fileobj = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return fileobj
+
+    def open_cached(self, key: str, fmt: str):
+        """캐시에 있으면 열어서 반환하고, 없으면 None."""
+        fileobj = self._open_hit(self.path_for(key, fmt))
+        if fileobj is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+        return fileobj
+
+    def open_or_create(self, key: str, fmt: str, build: Callable[[BinaryIO], None]) -> BinaryIO:
+        """
+        캐시 파일을 열어 반환한다. 없으면 build(fileobj) 로 만든다.
+        같은 키의 동시 요청은 한 스레드만 build 하고 나머지는 끝나길 기다렸다가 결과를 연다.
+        열린 파일을 돌려주므로 그 사이 정리되어도 응답은 끝까지 나간다.
+        """
+        path = self.path_for(key, fmt)
+        fileobj = self.open_cached(key, fmt)
+        if fileobj is not None:
+            return fileobj
+
+        lock = self._acquire_key_lock(key)
+        try:
+            with lock:
+                fileobj = self._open_hit(path)
+                if fileobj is not None:
+                    with self._lock:
+                        self._stats["coalesced"] += 1
+                    return fileobj
+                tmp_path = self.directory / f"{key}.{uuid.uuid4().hex}{TMP_SUFFIX}"
+                try:
+                    with open(tmp_path, "wb") as tmp:
+                        build(tmp)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                fileobj = open(path, "rb")
+                with self._lock:
+                    self._stats["misses"] += 1
+        finally:
+            self._release_key_lock(key)
+        self.evict()
+        return fileobj
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return entries
+
+    def evict(self) -> int:
+        """
+        max_age 보다 오래 쓰지 않은 파일을 지우고, 전체 크기가 max_bytes 를 넘으면
+        가장 오래 쓰지 않은 파일부터 지운다. 지운 파일 수를 반환한다.
+        """
+        now = time.time()
+        removed = 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            # 만들고 있는 임시 파일은 오래된 경우(중단된 생성)만 지운다
+            expired = self.max_age_seconds > 0 and now - mtime > self.max_age_seconds
+            if path.name.endswith(TMP_SUFFIX) and not expired:
+                continue
+            if not expired and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            with self._lock:
+                self._stats["evictions"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        entries = self._entries()
+        stats["files"] = len(entries)
+        stats["bytes"] = sum(size for _, size, _ in entries)
+        return stats
+
+
+__all__ = [
+    "ExportCache",
+]
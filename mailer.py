@@ -0,0 +1,332 @@
+"""
+메일 발송 대기열 (email_outbox) 과 백그라운드 발송기.
+
+요청 처리 코드는 enqueue_email 로 같은 트랜잭션 안에서 메일을 쌓기만 하고,
+실제 SMTP 전송은 발송기 스레드가 맡는다. 실패하면 지수 백오프로 재시도하고
+한도를 넘으면 dead 로 남겨 관리자 화면에서 다시 보낼 수 있게 한다.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import smtplib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from database import connection
+from utils import build_email_message, print_email, smtp_settings
+
+MAIL_SENDER_ENABLED = os.environ.get("WECAR_MAIL_SENDER_ENABLED", "true").lower() == "true"
+MAIL_MAX_ATTEMPTS = int(os.environ.get("WECAR_MAIL_MAX_ATTEMPTS", "6"))
+MAIL_RETRY_BASE_SECONDS = float(os.environ.get("WECAR_MAIL_RETRY_BASE_SECONDS", "30"))
+MAIL_RETRY_MAX_SECONDS = 3600
+MAIL_POLL_SECONDS = float(os.environ.get("WECAR_MAIL_POLL_SECONDS", "5"))
+MAIL_BATCH_SIZE = 20
+# 발송 중 프로세스가 죽으면 이 시간이 지난 뒤 다른 발송기가 다시 가져간다
+MAIL_SENDING_LEASE_SECONDS = 300
+
+# 한 SMTP 세션으로 보낼 최대 메일 수 (넘으면 다시 접속)
+SMTP_MAX_PER_SESSION = int(os.environ.get("WECAR_SMTP_MAX_PER_SESSION", "100"))
+SMTP_TIMEOUT_SECONDS = 30
+
+OUTBOX_STATUSES = ("queued", "sending", "sent", "dead")
+
+OnSent = Callable[[sqlite3.Connection, sqlite3.Row, str], None]
+_on_sent: Dict[str, OnSent] = {}
+
+
+def _timestamp(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def retry_delay(attempts: int) -> float:
+    """attempts 번 실패한 뒤의 재시도 대기 시간 (초)."""
+    return min(MAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), MAIL_RETRY_MAX_SECONDS)
+
+
+def register_on_sent(kind: str, callback: OnSent) -> None:
+    """
+    kind 메일이 전송되면 발송 결과와 같은 트랜잭션에서 callback(conn, row, sent_at) 을 호출한다.
+    """
+    _on_sent[kind] = callback
+
+
+def enqueue_email(
+    conn: sqlite3.Connection,
+    to_email: str,
+    subject: str,
+    body_html: str,
+    body_text: Optional[str] = None,
+    kind: str = "general",
+    diagnosis_id: Optional[int] = None,
+) -> int:
+    """
+    발송 대기열에 메일을 넣는다. 커밋은 호출한 쪽 트랜잭션에 맡기고,
+    커밋 후 outbox_sender.notify() 로 발송기를 깨운다.
+    """
+    cur = conn.execute(
+        """
+        INSERT INTO email_outbox (kind, diagnosis_id, to_email, subject, body_html, body_text)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (kind, diagnosis_id, to_email, subject, body_html, body_text),
+    )
+    return cur.lastrowid
+
+
+def pending_email(conn: sqlite3.Connection, kind: str, diagnosis_id: int) -> Optional[sqlite3.Row]:
+    """아직 보내지 않은(queued/sending) 같은 종류의 메일이 있으면 반환한다."""
+    return conn.execute(
+        """
+        SELECT * FROM email_outbox
+        WHERE diagnosis_id = ? AND kind = ? AND status IN ('queued', 'sending')
+        ORDER BY id DESC LIMIT 1
+        """,
+        (diagnosis_id, kind),
+    ).fetchone()
+
+
+def requeue_email(conn: sqlite3.Connection, outbox_id: int) -> bool:
+    """dead 메일을 시도 횟수를 초기화해 다시 대기열에 넣는다."""
+    cur = conn.execute(
+        """
+        UPDATE email_outbox
+        SET status = 'queued', attempts = 0, last_error = NULL,
+            next_attempt_at = datetime('now', 'localtime')
+        WHERE id = ? AND status = 'dead'
+        """,
+        (outbox_id,),
+    )
+    return cur.rowcount > 0
+
+
+def outbox_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    counts = {status: 0 for status in OUTBOX_STATUSES}
+    for row in conn.execute("SELECT status, COUNT(*) AS cnt FROM email_outbox GROUP BY status"):
+        counts[row["status"]] = row["cnt"]
+    return counts
+
+
+class SMTPTransport:
+    """
+    로그인된 SMTP 세션을 열어 둔 채 여러 통을 보낸다.
+    연결이 끊기면 한 번 다시 접속해 재시도하고, SMTP_MAX_PER_SESSION 통마다 새 세션을 연다.
+    """
+
+    # 서버가 메일을 거부한 경우: 다시 접속해도 결과가 같으므로 그대로 올린다
+    _REJECTED = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+    def __init__(self, max_per_session: int = SMTP_MAX_PER_SESSION) -> None:
+        self.max_per_session = max_per_session
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent_in_session = 0
+        self._lock = threading.Lock()
+        self.sessions_opened = 0
+
+    def _connect(self, settings: Dict[str, Any]) -> smtplib.SMTP:
+        if settings["starttls"] and (not settings["user"] or not settings["password"]):
+            raise ValueError("이메일 설정이 없습니다. 환경변수 SMTP_USER, SMTP_PASSWORD를 설정해주세요.")
+        smtp = smtplib.SMTP(settings["server"], settings["port"], timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings["starttls"]:
+                smtp.starttls()
+            if settings["user"]:
+                smtp.login(settings["user"], settings["password"])
+        except Exception:
+            smtp.close()
+            raise
+        self.sessions_opened += 1
+        self._sent_in_session = 0
+        return smtp
+
+    def _close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def send(self, to_email: str, subject: str, body_html: str, body_text: Optional[str] = None) -> None:
+        settings = smtp_settings()
+        if settings["test_mode"]:
+            print_email(to_email, subject, body_html, settings["sender"])
+            return
+        if not to_email:
+            raise ValueError("수신자 이메일 주소가 없습니다.")
+        msg = build_email_message(to_email, subject, body_html, body_text, settings["sender"])
+        with self._lock:
+            if self._smtp is not None and self._sent_in_session >= self.max_per_session:
+                self._close()
+            for attempt in (1, 2):
+                if self._smtp is None:
+                    self._smtp = self._connect(settings)
+                try:
+                    self._smtp.send_message(msg)
+                except self._REJECTED:
+                    raise
+                except (smtplib.SMTPException, OSError):
+                    # 끊긴 세션은 버리고 한 번만 다시 접속한다
+                    self._close()
+                    if attempt == 2:
+                        raise
+                    continue
+                self._sent_in_session += 1
+                return
+
+
+class OutboxSender:
+    """
+    email_outbox 를 주기적으로(또는 notify 로 깨워서) 훑어 기한이 된 메일을 보낸다.
+    여러 프로세스가 동시에 돌아도 같은 메일을 두 번 가져가지 않도록 BEGIN IMMEDIATE 로 선점한다.
+    """
+
+    def __init__(self, poll_seconds: float = MAIL_POLL_SECONDS, batch_size: int = MAIL_BATCH_SIZE,
+                 transport: Optional[SMTPTransport] = None) -> None:
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.transport = transport or SMTPTransport()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """발송기 스레드를 띄운다 (이미 떠 있으면 무시, fork 된 자식에서는 새로 띄운다)."""
+        if not MAIL_SENDER_ENABLED:
+            return
+        if multiprocessing.parent_process() is not None:
+            # 내보내기 프로세스 풀(spawn)의 자식이 app 을 다시 import 한 경우
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # fork 전 부모의 SMTP 세션은 자식에서 쓰지 않는다
+                self.transport = SMTPTransport(self.transport.max_per_session)
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="wecar-mailer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def notify(self) -> None:
+        """새 메일이 쌓였음을 알린다."""
+        self.start()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.process_due()
+            except Exception as e:
+                print(f"메일 발송기 오류: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                # 대기열이 비면 세션을 닫는다 (연속된 묶음 사이에서는 세션을 계속 쓴다)
+                self.transport.close()
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _claim(self, conn: sqlite3.Connection) -> List[sqlite3.Row]:
+        now = datetime.now()
+        lease_until = _timestamp(now + timedelta(seconds=MAIL_SENDING_LEASE_SECONDS))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                """
+                SELECT * FROM email_outbox
+                WHERE status IN ('queued', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+                """,
+                (_timestamp(now), self.batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+                [(lease_until, row["id"]) for row in rows],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return rows
+
+    def _deliver(self, row: sqlite3.Row) -> None:
+        self.transport.send(row["to_email"], row["subject"], row["body_html"], row["body_text"])
+
+    def _record_sent(self, conn: sqlite3.Connection, row: sqlite3.Row) -> None:
+        sent_at = _timestamp(datetime.now())
+        conn.execute(
+            """
+            UPDATE email_outbox
+            SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL
+            WHERE id = ?
+            """,
+            (sent_at, row["id"]),
+        )
+        callback = _on_sent.get(row["kind"])
+        if callback is not None:
+            callback(conn, row, sent_at)
+        conn.commit()
+
+    def _record_failure(self, conn: sqlite3.Connection, row: sqlite3.Row, error: Exception) -> None:
+        attempts = row["attempts"] + 1
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            status, next_attempt_at = "dead", _timestamp(datetime.now())
+        else:
+            status = "queued"
+            next_attempt_at = _timestamp(datetime.now() + timedelta(seconds=retry_delay(attempts)))
+        conn.execute(
+            """
+            UPDATE email_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+            """,
+            (status, attempts, next_attempt_at, str(error), row["id"]),
+        )
+        conn.commit()
+
+    def process_due(self) -> int:
+        """기한이 된 메일을 한 묶음 보내고 처리한 건수를 반환한다."""
+        with connection() as conn:
+            rows = self._claim(conn)
+            for row in rows:
+                try:
+                    self._deliver(row)
+                except Exception as e:
+                    print(f"메일 발송 실패 (outbox {row['id']}, {row['attempts'] + 1}회차): {e}")
+                    self._record_failure(conn, row, e)
+                else:
+                    self._record_sent(conn, row)
+        return len(rows)
+
+
+outbox_sender = OutboxSender()
+
+
+__all__ = [
+    "OUTBOX_STATUSES",
+    "OutboxSender",
+    "SMTPTransport",
+    "enqueue_email",
+    "outbox_counts",
+    "outbox_sender",
+    "pending_email",
+    "register_on_sent",
+    "requeue_email",
+    "retry_delay",
+]
@@ -109,6 +109,14 @@ function toggleLoadingButton(button, isLoading, originalText) {
     }
 }
 
+// 답변 저장 충돌(409) 처리: 다른 사람이 먼저 저장했으면 안내하고 reload 로 최신 내용을 다시 불러온다
+function handleSaveConflict(xhr, reload) {
+    if (xhr.status !== 409) return false;
+    alert((xhr.responseJSON && xhr.responseJSON.message) || '다른 사용자가 먼저 저장했습니다.');
+    if (reload) reload();
+    return true;
+}
+
 // URL 파라미터 가져오기
 function getUrlParameter(name) {
     const urlParams = new URLSearchParams(window.location.search);
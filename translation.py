@@ -0,0 +1,485 @@
+"""
+번역 캐시 (SQLite 영속 캐시 + 프로세스 내 LRU), 고정 번역표, 번역기 백엔드.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from database import connection
+
+CACHE_TTL_SECONDS = float(os.environ.get("WECAR_TRANSLATION_CACHE_TTL_DAYS", "180")) * 86400
+CACHE_MAX_ROWS = int(os.environ.get("WECAR_TRANSLATION_CACHE_MAX_ROWS", "200000"))
+LRU_SIZE = int(os.environ.get("WECAR_TRANSLATION_LRU_SIZE", "4096"))
+PRUNE_EVERY_WRITES = 500
+# 적중 기록(hit_count, last_used_at)은 모아 두었다가 이만큼 쌓이거나 이 시간이 지나면 한 번에 쓴다
+HIT_FLUSH_EVERY = 200
+HIT_FLUSH_SECONDS = 30.0
+
+_WHITESPACE = re.compile(r"\s+")
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 키 계산용 정규화: NFC, 앞뒤 공백 제거, 연속 공백을 하나로.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    (원문 언어, 대상 언어, 정규화된 원문 해시) 를 키로 번역 결과를 보관한다.
+    메모리 LRU 를 먼저 보고, 없으면 translation_cache 테이블을 조회한다.
+    """
+
+    def __init__(self, lru_size: int = LRU_SIZE, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 max_rows: int = CACHE_MAX_ROWS) -> None:
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._lru: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # 키 -> (아직 쓰지 않은 적중 수, 마지막 사용 시각)
+        self._pending_hits: Dict[CacheKey, Tuple[int, float]] = {}
+        self._last_flush = time.time()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: CacheKey, translated: str, created_at: float) -> None:
+        with self._lock:
+            self._lru[key] = (translated, created_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get(self, text: str, source_lang: str = "ko", target_lang: str = "ja") -> Optional[str]:
+        key = (source_lang, target_lang, text_hash(text))
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            fresh = entry is not None and not self._expired(entry[1], now)
+            if fresh:
+                self._lru.move_to_end(key)
+                self._stats["memory_hits"] += 1
+            elif entry is not None:
+                del self._lru[key]
+        if fresh:
+            self._record_hit(key, now)
+            return entry[0]
+
+        with connection() as conn:
+            row = conn.execute(
+                """
+                SELECT translated_text, created_at FROM translation_cache
+                WHERE source_lang = ? AND target_lang = ? AND text_hash = ?
+                """,
+                key,
+            ).fetchone()
+        if row is None or self._expired(row["created_at"], now):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["db_hits"] += 1
+        self._remember(key, row["translated_text"], row["created_at"])
+        self._record_hit(key, now)
+        return row["translated_text"]
+
+    def _record_hit(self, key: CacheKey, now: float) -> None:
+        """적중을 메모리에만 기록한다. 조회가 쓰기 잠금을 잡지 않도록 DB 반영은 flush_hits 에서 묶어서 한다."""
+        with self._lock:
+            count = self._pending_hits.get(key, (0, now))[0]
+            self._pending_hits[key] = (count + 1, now)
+            due = len(self._pending_hits) >= HIT_FLUSH_EVERY or now - self._last_flush >= HIT_FLUSH_SECONDS
+        if due:
+            self.flush_hits()
+
+    def flush_hits(self) -> int:
+        """
+        모아 둔 적중 기록을 한 트랜잭션으로 반영하고 반영한 키 수를 반환한다.
+        통계용 값이므로 쓰기에 실패하면 버린다.
+        """
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+            self._last_flush = time.time()
+        if not pending:
+            return 0
+        try:
+            with connection() as conn:
+                conn.executemany(
+                    """
+                    UPDATE translation_cache
+                    SET last_used_at = MAX(last_used_at, ?), hit_count = hit_count + ?
+                    WHERE source_lang = ? AND target_lang = ? AND text_hash = ?
+                    """,
+                    [(last_used, count) + key for key, (count, last_used) in pending.items()],
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"번역 캐시 적중 기록 실패 ({len(pending)}건): {e}")
+            return 0
+        return len(pending)
+
+    def set(self, text: str, translated: str, source_lang: str = "ko", target_lang: str = "ja") -> None:
+        key = (source_lang, target_lang, text_hash(text))
+        now = time.time()
+        with connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO translation_cache
+                    (source_lang, target_lang, text_hash, source_text, translated_text, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_lang, target_lang, text_hash) DO UPDATE SET
+                    translated_text = excluded.translated_text,
+                    created_at = excluded.created_at,
+                    last_used_at = excluded.last_used_at
+                """,
+                key + (normalize_text(text), translated, now, now),
+            )
+            conn.commit()
+        self._remember(key, translated, now)
+        with self._lock:
+            self._stats["writes"] += 1
+            self._writes += 1
+            should_prune = self._writes % PRUNE_EVERY_WRITES == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        TTL 이 지난 항목과 max_rows 를 넘는 오래된(최근 사용 순) 항목을 삭제한다.
+        """
+        # 최근 사용 순서가 맞도록 모아 둔 적중 기록을 먼저 반영한다
+        self.flush_hits()
+        removed = 0
+        with connection() as conn:
+            if self.ttl_seconds > 0:
+                removed += conn.execute(
+                    "DELETE FROM translation_cache WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                ).rowcount
+            overflow = conn.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0] - self.max_rows
+            if overflow > 0:
+                removed += conn.execute(
+                    """
+                    DELETE FROM translation_cache WHERE rowid IN (
+                        SELECT rowid FROM translation_cache ORDER BY last_used_at ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                ).rowcount
+            conn.commit()
+        with self._lock:
+            self._stats["evictions"] += removed
+        return removed
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+            stats["pending_hits"] = len(self._pending_hits)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+translation_cache = TranslationCache()
+
+
+# 고정 라벨, 기본 요청 항목, 자주 쓰는 점검 용어. 번역기보다 먼저 적용한다.
+KO_JA_PHRASES: Dict[str, str] = {
+    # 라벨
+    "차량번호": "車両番号",
+    "출품번호": "出品番号",
+    "주차번호": "駐車番号",
+    "평가사명": "評価士名",
+    "신청일": "申請日",
+    "회신일": "回答日",
+    "순번": "順",
+    "진단신청내용": "診断申請内容",
+    "회신": "回答",
+    "비고": "備考",
+    # 기본 요청 항목 (app.DEFAULT_REQUEST_ITEMS)
+    "외관 점검 내역": "外観点検内容",
+    "실내 및 전장 점검 내역": "室内及び電装点検内容",
+    "엔진/동력계 점검 내역": "エンジン/動力系点検内容",
+    "하부/프레임 점검 내역": "下回り/フレーム点検内容",
+    "기타 요청사항": "その他要望事項",
+    # 점검 용어
+    "양호": "良好",
+    "불량": "不良",
+    "보통": "普通",
+    "이상 없음": "異常なし",
+    "이상없음": "異常なし",
+    "해당 없음": "該当なし",
+    "해당없음": "該当なし",
+    "확인 필요": "要確認",
+    "점검 필요": "要点検",
+    "교환 필요": "要交換",
+    "수리 필요": "要修理",
+    "교환": "交換",
+    "수리": "修理",
+    "판금": "板金",
+    "도장": "塗装",
+    "부식": "腐食",
+    "누유": "オイル漏れ",
+    "누수": "水漏れ",
+    "소음": "異音",
+    "찍힘": "へこみ",
+    "긁힘": "擦り傷",
+    "스크래치": "擦り傷",
+    "사고 이력": "事故歴",
+    "사고이력": "事故歴",
+    "무사고": "無事故",
+    "침수": "冠水",
+    "외관": "外観",
+    "실내": "室内",
+    "전장": "電装",
+    "엔진": "エンジン",
+    "변속기": "トランスミッション",
+    "하부": "下回り",
+    "프레임": "フレーム",
+    "타이어": "タイヤ",
+    "브레이크": "ブレーキ",
+    "에어컨": "エアコン",
+    "배터리": "バッテリー",
+}
+
+# 값이 식별자(번호, 이름)라서 번역하지 않고 그대로 두는 라벨
+VERBATIM_VALUE_LABELS = {"차량번호", "출품번호", "주차번호", "평가사명"}
+
+_LABEL_VALUE = re.compile(r"^([^:：]{1,20})\s*[:：]\s*(.*)$")
+
+
+class PhraseTable:
+    """
+    (원문 언어, 대상 언어)별 고정 번역표.
+    '라벨: 값' 형태는 라벨과 값을 나눠 라벨만 번역하고, 식별자 값은 그대로 둔다.
+    """
+
+    def __init__(self) -> None:
+        self._phrases: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._verbatim: Dict[Tuple[str, str], set] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def register(self, phrases: Dict[str, str], source_lang: str = "ko", target_lang: str = "ja",
+                 verbatim_labels: Optional[set] = None) -> None:
+        key = (source_lang, target_lang)
+        table = self._phrases.setdefault(key, {})
+        table.update({normalize_text(k): v for k, v in phrases.items()})
+        if verbatim_labels:
+            self._verbatim.setdefault(key, set()).update(normalize_text(label) for label in verbatim_labels)
+
+    def _lookup(self, text: str, key: Tuple[str, str]) -> Optional[str]:
+        table = self._phrases.get(key)
+        if not table:
+            return None
+        found = table.get(text)
+        if found is not None:
+            return found
+        match = _LABEL_VALUE.match(text)
+        if not match:
+            return None
+        label, value = match.group(1).strip(), match.group(2).strip()
+        label_translated = table.get(label)
+        if label_translated is None:
+            return None
+        if label in self._verbatim.get(key, ()):
+            value_translated = value
+        else:
+            value_translated = table.get(value) if value else ""
+            if value_translated is None:
+                return None
+        return f"{label_translated}: {value_translated}" if value_translated else label_translated
+
+    def translate(self, text: str, source_lang: str = "ko", target_lang: str = "ja") -> Optional[str]:
+        """고정 번역이 있으면 반환하고, 없으면 None (번역기로 보낸다)."""
+        result = self._lookup(normalize_text(text), (source_lang, target_lang))
+        with self._lock:
+            self._stats["hits" if result is not None else "misses"] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["phrases"] = sum(len(table) for table in self._phrases.values())
+        return stats
+
+
+phrase_table = PhraseTable()
+phrase_table.register(KO_JA_PHRASES, "ko", "ja", VERBATIM_VALUE_LABELS)
+
+
+BATCH_SEPARATOR = "\n"
+MAX_BATCH_CHARS = 4500
+# 번역기 요청 하나의 제한 시간. 응답이 없는 요청이 번역 워커를 계속 붙잡지 않도록 한다.
+TRANSLATOR_TIMEOUT_SECONDS = float(os.environ.get("WECAR_TRANSLATOR_TIMEOUT_SECONDS", "10"))
+
+
+class TranslatorBackend(ABC):
+    """
+    번역기 백엔드 인터페이스. translate_batch 는 입력과 같은 길이/순서의 결과를 반환한다.
+    구현하지 않은 백엔드는 번역 작업 중이 아니라 만들 때 TypeError 로 실패한다.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """texts 를 source_lang 에서 target_lang 으로 번역한다."""
+
+
+def _batch_chunks(texts: List[str], max_chars: int = MAX_BATCH_CHARS) -> Iterator[List[str]]:
+    """
+    max_chars 를 넘지 않도록 묶는다. 줄바꿈이 있는 문장은 구분자와 섞이지 않도록 혼자 한 묶음이 된다.
+    """
+    chunk: List[str] = []
+    size = 0
+    for text in texts:
+        if BATCH_SEPARATOR in text:
+            if chunk:
+                yield chunk
+                chunk, size = [], 0
+            yield [text]
+            continue
+        if chunk and size + len(text) + 1 > max_chars:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + 1
+    if chunk:
+        yield chunk
+
+
+class GoogleTransBackend(TranslatorBackend):
+    """
+    googletrans 백엔드. 여러 줄을 한 요청으로 보내고 줄 단위로 다시 나눈다.
+    요청마다 timeout_seconds 제한을 두고, 넘으면 TimeoutError 로 실패시킨다 (번역 작업 실패로 기록된다).
+    """
+
+    name = "googletrans"
+
+    def __init__(self, timeout_seconds: float = TRANSLATOR_TIMEOUT_SECONDS) -> None:
+        self.timeout_seconds = timeout_seconds
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        import httpx
+
+        try:
+            return self._translate_batch(texts, source_lang, target_lang)
+        except (httpx.ConnectTimeout, httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout) as e:
+            raise TimeoutError(f"번역기 응답 시간 초과 ({self.timeout_seconds:g}초)") from e
+
+    def _translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        import httpx
+        from googletrans import Translator
+
+        translator = Translator(timeout=httpx.Timeout(self.timeout_seconds))
+        results: List[str] = []
+        for chunk in _batch_chunks(texts):
+            translated = translator.translate(BATCH_SEPARATOR.join(chunk), src=source_lang, dest=target_lang)
+            if len(chunk) == 1:
+                results.append(translated.text.strip())
+                continue
+            parts = translated.text.split(BATCH_SEPARATOR)
+            if len(parts) != len(chunk):
+                # 번역기가 줄을 합치거나 나눈 경우 해당 묶음만 한 문장씩 다시 보낸다.
+                parts = [translator.translate(text, src=source_lang, dest=target_lang).text for text in chunk]
+            results.extend(part.strip() for part in parts)
+        return results
+
+
+class StubBackend(TranslatorBackend):
+    """
+    네트워크 없이 결정적인 결과를 돌려주는 부하 테스트용 백엔드.
+    WECAR_TRANSLATOR_STUB_DELAY_MS 로 요청당 지연을 흉내낼 수 있다.
+    """
+
+    name = "stub"
+
+    def __init__(self, delay_ms: Optional[float] = None) -> None:
+        if delay_ms is None:
+            delay_ms = float(os.environ.get("WECAR_TRANSLATOR_STUB_DELAY_MS", "0"))
+        self.delay_ms = delay_ms
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+_BACKENDS: Dict[str, Callable[[], TranslatorBackend]] = {
+    GoogleTransBackend.name: GoogleTransBackend,
+    StubBackend.name: StubBackend,
+}
+_backend: Optional[TranslatorBackend] = None
+_backend_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], TranslatorBackend]) -> None:
+    """
+    번역기 백엔드를 등록한다. WECAR_TRANSLATOR=<name> 으로 선택한다.
+    """
+    _BACKENDS[name] = factory
+
+
+def get_backend() -> TranslatorBackend:
+    """
+    WECAR_TRANSLATOR 환경변수(기본 googletrans)로 선택된 백엔드를 반환한다.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get("WECAR_TRANSLATOR", GoogleTransBackend.name)
+            if name not in _BACKENDS:
+                raise ValueError(f"알 수 없는 번역기 백엔드입니다: {name}")
+            _backend = _BACKENDS[name]()
+        return _backend
+
+
+def set_backend(backend: Optional[TranslatorBackend]) -> None:
+    """
+    사용할 백엔드 인스턴스를 직접 지정한다 (None 이면 환경변수로 다시 선택).
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+__all__ = [
+    "GoogleTransBackend",
+    "PhraseTable",
+    "StubBackend",
+    "TranslationCache",
+    "TranslatorBackend",
+    "get_backend",
+    "normalize_text",
+    "phrase_table",
+    "register_backend",
+    "set_backend",
+    "text_hash",
+    "translation_cache",
+]
@@ -2,118 +2,415 @@
 유틸리티 함수 (엑셀, PDF, 번역, 이메일 등)
 """
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from reportlab.lib.pagesizes import A4, letter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+from reportlab.lib.pagesizes import A4, landscape, letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, LongTable, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from googletrans import Translator
+from translation import get_backend, normalize_text, phrase_table, translation_cache
 from datetime import datetime
+from itertools import chain, islice
+import csv
+import io
+import json
 import os
 import smtplib
+import threading
+import time
+import zipfile
+from xml.sax.saxutils import escape
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+# 쓰기 전용 시트는 행보다 열 너비를 먼저 정해야 하므로 앞쪽 일부 행만 보고 너비를 정한다
+XLSX_WIDTH_SAMPLE_ROWS = 500
+XLSX_MAX_COLUMN_WIDTH = 50
+XLSX_HEADER_STYLE = "wecar_header"
+XLSX_CELL_STYLE = "wecar_cell"
+
+
+def _add_xlsx_styles(wb):
+    """헤더/본문 셀 스타일을 이름 있는 스타일로 한 번만 등록한다."""
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    
+    header = NamedStyle(name=XLSX_HEADER_STYLE)
+    header.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header.font = Font(bold=True, color="FFFFFF", size=11)
+    header.alignment = Alignment(horizontal='center', vertical='center')
+    header.border = border
+    wb.add_named_style(header)
+    
+    cell = NamedStyle(name=XLSX_CELL_STYLE)
+    cell.alignment = Alignment(horizontal='left', vertical='center')
+    cell.border = border
+    wb.add_named_style(cell)
+
+
+def write_excel(rows, headers, fileobj, sheet_title="Sheet1", sample_rows=XLSX_WIDTH_SAMPLE_ROWS):
+    """
+    행 iterable 을 쓰기 전용 워크시트로 fileobj(경로 또는 파일 객체)에 기록한다.
+    행을 한 줄씩 흘려 쓰므로 행 수가 많아도 메모리 사용량이 일정하다.
+    쓰기 전용 시트는 첫 행을 쓰기 전에 열 너비를 정해야 하므로, 너비는 헤더와 앞쪽 sample_rows 행만 보고 정한다.
+    그보다 뒤에 더 긴 값이 있으면 기본 화면에서 잘려 보일 수 있다 (값 자체는 그대로 저장된다).
+    모든 행으로 너비를 정하려면 행 전체를 메모리에 올리거나 두 번 읽어야 하므로 이 한계를 받아들인다.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    _add_xlsx_styles(wb)
+    
+    # 열 너비: 헤더와 앞쪽 sample_rows 행만 보고 정한다
+    rows = iter(rows)
+    sample = list(islice(rows, sample_rows))
+    widths = [len(str(header)) for header in headers]
+    for row in sample:
+        for col_idx, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(str(value))
+            if col_idx >= len(widths):
+                widths.append(length)
+            elif length > widths[col_idx]:
+                widths[col_idx] = length
+    for col_idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, XLSX_MAX_COLUMN_WIDTH)
+    
+    def styled(values, style):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        return cells
+    
+    ws.append(styled(headers, XLSX_HEADER_STYLE))
+    for row in chain(sample, rows):
+        ws.append(styled(row, XLSX_CELL_STYLE))
+    
+    wb.save(fileobj)
+    return fileobj
+
 def export_to_excel(data, headers, filename):
     """데이터를 엑셀 파일로 내보내기"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sheet1"
-    
-    # 헤더 스타일
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # 헤더 작성
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-    
-    # 데이터 작성
-    for row_idx, row_data in enumerate(data, 2):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = border
-            cell.alignment = Alignment(horizontal='left', vertical='center')
-    
-    # 열 너비 자동 조정
-    for col in ws.columns:
-        max_length = 0
-        col_letter = col[0].column_letter
-        for cell in col:
+    return write_excel(data, headers, filename)
+
+# PDF 글꼴: WECAR_PDF_FONT(TTF/TTC 경로) → 흔한 설치 경로 → 내장 CID 글꼴 순으로 찾는다.
+# Helvetica 는 한글/일본어를 그리지 못한다.
+PDF_FONT_NAME = "WecarCJK"
+PDF_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/Library/Fonts/NanumGothic.ttf",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+PDF_FALLBACK_CID_FONT = "HYSMyeongJo-Medium"
+# 큰 표를 이 행 수씩 나눈 LongTable 로 그린다. 표가 쪽을 넘길 때마다 남은 행 높이를 다시 계산하므로
+# 한 표를 통째로 나누는 것보다 작은 표 여러 개가 훨씬 빠르다.
+PDF_CHUNK_ROWS = 200
+PDF_FONT_SIZE = 8
+PDF_HEADER_FONT_SIZE = 9
+PDF_CELL_PADDING = 3
+# 열이 이보다 많으면 가로 방향으로 출력한다
+PDF_LANDSCAPE_MIN_COLUMNS = 7
+
+_pdf_font = None
+_pdf_font_lock = threading.Lock()
+_pdf_table_style = None
+
+
+def register_pdf_font():
+    """CJK 글꼴을 프로세스당 한 번만 등록하고 그 이름을 반환한다."""
+    global _pdf_font
+    if _pdf_font is not None:
+        return _pdf_font
+    with _pdf_font_lock:
+        if _pdf_font is not None:
+            return _pdf_font
+        configured = os.environ.get("WECAR_PDF_FONT")
+        candidates = ([configured] if configured else []) + list(PDF_FONT_CANDIDATES)
+        for path in candidates:
+            if not os.path.isfile(path):
+                continue
             try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[col_letter].width = adjusted_width
-    
-    wb.save(filename)
-    return filename
+                pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, path, subfontIndex=0))
+            except Exception as e:
+                print(f"PDF 글꼴 등록 실패 ({path}): {e}")
+                continue
+            _pdf_font = PDF_FONT_NAME
+            break
+        else:
+            pdfmetrics.registerFont(UnicodeCIDFont(PDF_FALLBACK_CID_FONT))
+            _pdf_font = PDF_FALLBACK_CID_FONT
+        return _pdf_font
+
+
+def _get_pdf_table_style(font):
+    """모든 표 조각이 함께 쓰는 TableStyle (행 수와 무관한 범위만 써서 한 번만 만든다)."""
+    global _pdf_table_style
+    if _pdf_table_style is None:
+        _pdf_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, 0), PDF_HEADER_FONT_SIZE),
+            ('FONTSIZE', (0, 1), (-1, -1), PDF_FONT_SIZE),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#366092')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5DC')]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ])
+    return _pdf_table_style
+
+
+def _pdf_column_widths(headers, sample, font, available):
+    """헤더와 앞쪽 행의 글자 폭으로 열 너비를 정하고 쪽 너비에 맞게 줄인다."""
+    widths = [pdfmetrics.stringWidth(str(header), font, PDF_HEADER_FONT_SIZE) for header in headers]
+    for row in sample:
+        for col_idx, value in enumerate(row[:len(widths)]):
+            if value is None:
+                continue
+            width = pdfmetrics.stringWidth(str(value), font, PDF_FONT_SIZE)
+            if width > widths[col_idx]:
+                widths[col_idx] = width
+    widths = [width + PDF_CELL_PADDING * 2 + 2 for width in widths]
+    total = sum(widths)
+    if total <= available:
+        return widths
+    # 좁은 열은 그대로 두고 넓은 열만 줄인다
+    share = available / len(widths)
+    narrow = sum(width for width in widths if width <= share)
+    wide = total - narrow
+    scale = max(available - narrow, 0) / wide if wide else 1
+    return [width if width <= share else width * scale for width in widths]
+
+
+def _wrap_pdf_text(text, font, size, width):
+    """
+    글을 width 안에 들어가도록 줄바꿈한다. 공백 기준으로 먼저 나누고,
+    띄어쓰기 없는 한글/일본어처럼 그래도 넘치는 줄은 글자 단위로 자른다.
+    """
+    lines = []
+    for line in simpleSplit(text, font, size, width):
+        while pdfmetrics.stringWidth(line, font, size) > width and len(line) > 1:
+            used = 0
+            for cut, char in enumerate(line):
+                used += pdfmetrics.stringWidth(char, font, size)
+                if used > width:
+                    break
+            cut = max(cut, 1)
+            lines.append(line[:cut])
+            line = line[cut:]
+        lines.append(line)
+    return '\n'.join(lines)
+
 
 def export_to_pdf(data, headers, filename, title="위카아라이 진단시스템"):
-    """데이터를 PDF 파일로 내보내기"""
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    elements = []
+    """
+    데이터를 PDF 로 내보내기 (filename 은 경로 또는 파일 객체).
+    메모리 버퍼에 PDF_CHUNK_ROWS 행씩 LongTable 로 그린 뒤 한 번에 기록한다.
+    각 표는 쪽이 넘어가도 헤더 행을 반복하고, 열 너비보다 긴 글은 미리 줄바꿈해 둔다
+    (칸마다 Paragraph 를 만드는 것보다 훨씬 빠르다).
+    """
+    font = register_pdf_font()
+    pagesize = landscape(A4) if len(headers) >= PDF_LANDSCAPE_MIN_COLUMNS else A4
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=pagesize, title=title,
+        leftMargin=0.5 * inch, rightMargin=0.5 * inch, topMargin=0.5 * inch, bottomMargin=0.5 * inch,
+    )
     
-    styles = getSampleStyleSheet()
     title_style = ParagraphStyle(
         'CustomTitle',
-        parent=styles['Heading1'],
+        fontName=font,
         fontSize=18,
+        leading=22,
         textColor=colors.HexColor('#366092'),
         alignment=TA_CENTER,
-        spaceAfter=30
+        spaceAfter=20
     )
+    elements = [Paragraph(escape(title), title_style), Spacer(1, 0.1 * inch)]
     
-    # 제목
-    elements.append(Paragraph(title, title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # 테이블 데이터 준비
-    table_data = [headers] + data
-    
-    # 테이블 생성
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#366092')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    
-    elements.append(table)
+    rows = iter(data)
+    first = list(islice(rows, PDF_CHUNK_ROWS))
+    col_widths = _pdf_column_widths(headers, first, font, doc.width)
+    fit_widths = [width - PDF_CELL_PADDING * 2 for width in col_widths]
+    table_style = _get_pdf_table_style(font)
+    header_row = [str(header) for header in headers]
+    
+    def cell(value, col_idx):
+        if value is None:
+            return ''
+        text = str(value)
+        if col_idx < len(fit_widths) and pdfmetrics.stringWidth(text, font, PDF_FONT_SIZE) > fit_widths[col_idx]:
+            return _wrap_pdf_text(text, font, PDF_FONT_SIZE, fit_widths[col_idx])
+        return text
+    
+    chunk = first
+    while True:
+        table_data = [header_row] + [[cell(value, i) for i, value in enumerate(row)] for row in chunk]
+        table = LongTable(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        elements.append(table)
+        chunk = list(islice(rows, PDF_CHUNK_ROWS))
+        if not chunk:
+            break
     
     doc.build(elements)
+    if isinstance(filename, (str, os.PathLike)):
+        with open(filename, 'wb') as f:
+            f.write(buffer.getbuffer())
+    else:
+        filename.write(buffer.getbuffer())
     return filename
 
+def render_export_document(task):
+    """
+    진단 상세 묶음 내보내기의 프로세스 풀 작업. spawn 으로 띄운 자식에서 이름으로 찾을 수 있도록 최상위에 둔다.
+    task = (파일 이름, 형식, 제목, 헤더, 행) 을 받아 (파일 이름, 파일 바이트, 렌더링 초) 를 반환한다.
+    """
+    name, fmt, title, headers, rows = task
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    if fmt == 'xlsx':
+        write_excel(rows, headers, buffer)
+    else:
+        export_to_pdf(rows, headers, buffer, title=title)
+    return name, buffer.getvalue(), time.perf_counter() - started
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """ZipFile 이 쓴 바이트를 모아 두었다가 꺼내 주는 쓰기 전용(탐색 불가) 버퍼."""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+    
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries):
+    """
+    (이름, 바이트) iterable 을 ZIP 바이트 덩어리로 흘려보낸다. 항목 하나를 쓸 때마다 내보낸다.
+    PDF/XLSX 는 이미 압축된 형식이라 문서는 그대로 담고, 나머지(목록 등)만 압축한다.
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in entries:
+            compress = zipfile.ZIP_STORED if name.endswith(('.pdf', '.xlsx')) else zipfile.ZIP_DEFLATED
+            archive.writestr(name, data, compress_type=compress)
+            yield buffer.pop()
+    yield buffer.pop()
+
+# 스트리밍 내보내기: 이 행 수만큼 모아서 한 덩어리로 내보낸다
+STREAM_CHUNK_ROWS = 500
+
+
+def iter_csv(rows, headers, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    행 iterable 을 CSV 바이트 덩어리로 흘려보낸다 (엑셀에서 한글이 깨지지 않도록 UTF-8 BOM).
+    BOM 과 헤더 줄은 rows 를 읽기 전에 첫 덩어리로 바로 내보낸다.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(headers)
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_ndjson(rows, headers, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    행 iterable 을 헤더를 키로 하는 한 줄짜리 JSON 객체들로 흘려보낸다.
+    헤더 줄이 없으므로 첫 행은 모으지 않고 바로 내보낸다.
+    """
+    lines = []
+    first = True
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, row)), ensure_ascii=False, default=str))
+        if first or len(lines) >= chunk_rows:
+            first = False
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
 def translate_to_japanese(text):
-    """텍스트를 일본어로 번역"""
-    try:
-        translator = Translator()
-        result = translator.translate(text, src='ko', dest='ja')
-        return result.text
-    except Exception as e:
-        print(f"번역 오류: {e}")
-        return text
+    """텍스트를 일본어로 번역 (번역 캐시에 있으면 네트워크 호출 없이 반환)"""
+    return translate_many([text])[0]
+
+def translate_many(texts, src='ko', dest='ja', refresh=False, strict=False):
+    """
+    여러 문장을 한꺼번에 번역한다.
+    고정 번역표와 캐시에 없는 문장만 중복 제거 후 번역기 백엔드에 한 번에 넘기고,
+    입력과 같은 순서의 결과 목록을 반환한다. 정규화한 문장은 중복 제거/캐시 키로만 쓰고
+    번역기에는 원문(줄바꿈 포함)을 넘긴다.
+    refresh=True 이면 캐시를 건너뛰고 다시 번역한다. 실패하면 원문을 그대로 돌려주며,
+    strict=True 이면 예외를 그대로 올린다.
+    """
+    results = {}
+    # 정규화 키 -> 번역기에 넘길 원문 (처음 나온 것)
+    pending = {}
+    for text in texts:
+        if not text or not text.strip():
+            continue
+        key = normalize_text(text)
+        if key in results or key in pending:
+            continue
+        phrase = phrase_table.translate(key, src, dest)
+        if phrase is not None:
+            results[key] = phrase
+            continue
+        cached = None if refresh else translation_cache.get(text, src, dest)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending[key] = text
+
+    if pending:
+        try:
+            translated = get_backend().translate_batch(list(pending.values()), src, dest)
+        except Exception as e:
+            print(f"번역 오류: {e}")
+            if strict:
+                raise
+        else:
+            for (key, original), value in zip(pending.items(), translated):
+                results[key] = value
+                translation_cache.set(original, value, src, dest)
+
+    return [results.get(normalize_text(text), text) if text and text.strip() else text for text in texts]
 
 def format_datetime(dt):
     """날짜시간 포맷팅"""
@@ -131,33 +428,64 @@ def format_date(d):
         return d
     return d.strftime('%Y-%m-%d')
 
+def smtp_settings():
+    """환경변수에서 SMTP 설정을 읽는다."""
+    smtp_user = os.environ.get('SMTP_USER', '')
+    return {
+        'server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'port': int(os.environ.get('SMTP_PORT', '587')),
+        'user': smtp_user,
+        'password': os.environ.get('SMTP_PASSWORD', ''),
+        'sender': os.environ.get('SMTP_FROM', '') or smtp_user or 'wecarmobility@example.com',
+        # 로컬 테스트용 SMTP 서버(aiosmtpd 등)는 STARTTLS/로그인 없이 쓴다
+        'starttls': os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true',
+        # 테스트 모드: 실제 이메일 전송 대신 로그만 출력
+        'test_mode': os.environ.get('EMAIL_TEST_MODE', 'true').lower() == 'true',
+    }
+
+
+def print_email(to_email, subject, body_html, sender):
+    """테스트 모드에서 이메일 내용을 로그로 출력"""
+    print("=" * 50)
+    print("📧 이메일 전송 (테스트 모드)")
+    print(f"수신자: {to_email}")
+    print(f"제목: {subject}")
+    print(f"발신자: {sender}")
+    print("-" * 30)
+    print("내용:")
+    # HTML 태그 제거하여 간단히 표시
+    import re
+    clean_text = re.sub('<[^<]+?>', '', body_html)
+    print(clean_text[:500] + "..." if len(clean_text) > 500 else clean_text)
+    print("=" * 50)
+
+
+def build_email_message(to_email, subject, body_html, body_text=None, sender=None):
+    """텍스트/HTML 대체 본문을 가진 메일 메시지 생성"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender or smtp_settings()['sender']
+    msg['To'] = to_email
+    
+    if body_text:
+        part1 = MIMEText(body_text, 'plain', 'utf-8')
+        msg.attach(part1)
+    
+    part2 = MIMEText(body_html, 'html', 'utf-8')
+    msg.attach(part2)
+    return msg
+
+
 def send_email(to_email, subject, body_html, body_text=None):
-    """이메일 전송"""
+    """이메일 전송 (한 통마다 연결). 여러 통은 mailer.SMTPTransport 로 보낸다."""
     try:
-        smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-        smtp_user = os.environ.get('SMTP_USER', '')
-        smtp_password = os.environ.get('SMTP_PASSWORD', '')
+        settings = smtp_settings()
         
-        # 테스트 모드: 실제 이메일 전송 대신 로그만 출력
-        test_mode = os.environ.get('EMAIL_TEST_MODE', 'true').lower() == 'true'
-        
-        if test_mode:
-            print("=" * 50)
-            print("📧 이메일 전송 (테스트 모드)")
-            print(f"수신자: {to_email}")
-            print(f"제목: {subject}")
-            print(f"발신자: {smtp_user or 'wecarmobility@example.com'}")
-            print("-" * 30)
-            print("내용:")
-            # HTML 태그 제거하여 간단히 표시
-            import re
-            clean_text = re.sub('<[^<]+?>', '', body_html)
-            print(clean_text[:500] + "..." if len(clean_text) > 500 else clean_text)
-            print("=" * 50)
+        if settings['test_mode']:
+            print_email(to_email, subject, body_html, settings['sender'])
             return True
         
-        if not smtp_user or not smtp_password:
+        if settings['starttls'] and (not settings['user'] or not settings['password']):
             error_msg = "이메일 설정이 없습니다. 환경변수 SMTP_USER, SMTP_PASSWORD를 설정해주세요."
             print(error_msg)
             raise ValueError(error_msg)
@@ -167,21 +495,13 @@ def send_email(to_email, subject, body_html, body_text=None):
             print(error_msg)
             raise ValueError(error_msg)
         
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = smtp_user
-        msg['To'] = to_email
-        
-        if body_text:
-            part1 = MIMEText(body_text, 'plain', 'utf-8')
-            msg.attach(part1)
-        
-        part2 = MIMEText(body_html, 'html', 'utf-8')
-        msg.attach(part2)
+        msg = build_email_message(to_email, subject, body_html, body_text, settings['sender'])
         
-        with smtplib.SMTP(smtp_server, smtp_port, timeout=30) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
+        with smtplib.SMTP(settings['server'], settings['port'], timeout=30) as server:
+            if settings['starttls']:
+                server.starttls()
+            if settings['user']:
+                server.login(settings['user'], settings['password'])
             server.send_message(msg)
         
         print(f"이메일 전송 성공: {to_email}")
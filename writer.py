@@ -0,0 +1,208 @@
+"""
+쓰기 작업 묶음 커밋 (group commit).
+
+요청 스레드는 db_writer.run(op) 으로 쓰기 작업 op(conn) 을 넘기고 결과를 기다린다.
+쓰기 스레드 하나가 몇 ms 안에 들어온 작업들을 한 트랜잭션으로 묶어 실행하고 한 번만 커밋한다.
+작업마다 SAVEPOINT 를 두므로 한 작업이 실패해도 그 작업만 되돌리고, 예외는 그 호출자에게만 전달된다.
+결과는 커밋이 끝난 뒤에 돌려주므로 호출자가 응답할 때는 이미 저장되어 있다.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+from database import connection, get_connection
+
+WRITER_ENABLED = os.environ.get("WECAR_WRITER_ENABLED", "true").lower() == "true"
+WRITER_MAX_BATCH = int(os.environ.get("WECAR_WRITER_MAX_BATCH", "64"))
+WRITER_MAX_WAIT_MS = float(os.environ.get("WECAR_WRITER_MAX_WAIT_MS", "2"))
+# run() 이 커밋을 기다리는 최대 시간. 쓰기 스레드에 문제가 생겨도 요청이 끝없이 멈추지 않게 한다.
+WRITER_TIMEOUT_SECONDS = float(os.environ.get("WECAR_WRITER_TIMEOUT_SECONDS", "30"))
+
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+
+class GroupCommitWriter:
+    """
+    쓰기 작업 대기열과 쓰기 스레드. 첫 작업이 들어오면 max_wait 동안(또는 max_batch 개가 찰 때까지)
+    더 모아서 BEGIN IMMEDIATE ~ COMMIT 한 번으로 처리한다.
+    작업 함수는 conn 으로만 쓰고 커밋/롤백하지 않으며, 요청 컨텍스트(session 등)에 접근하지 않는다.
+    """
+
+    def __init__(self, max_batch: int = WRITER_MAX_BATCH, max_wait_ms: float = WRITER_MAX_WAIT_MS) -> None:
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[Tuple[WriteOp, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def start(self) -> None:
+        """쓰기 스레드를 띄운다 (이미 떠 있으면 무시, fork 된 자식에서는 새로 띄운다)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # fork 전 부모의 대기열과 연결은 자식에서 쓰지 않는다
+                self._queue = queue.Queue()
+                self._conn = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="wecar-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """대기 중인 작업을 모두 처리한 뒤 쓰기 스레드를 끝낸다."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, op: WriteOp) -> Future:
+        """작업을 대기열에 넣고 Future 를 반환한다. 비활성화되어 있으면 바로 한 트랜잭션으로 실행한다."""
+        future: Future = Future()
+        if not WRITER_ENABLED:
+            future.set_running_or_notify_cancel()
+            try:
+                with connection() as conn:
+                    result = op(conn)
+                    conn.commit()
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            return future
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            self.start()
+        self._queue.put((op, future))
+        return future
+
+    def run(self, op: WriteOp, timeout: Optional[float] = WRITER_TIMEOUT_SECONDS) -> Any:
+        """
+        작업을 넘기고 커밋될 때까지 기다려 결과를 반환한다 (실패하면 그 예외를 다시 던진다).
+        timeout 안에 시작하지 못한 작업은 취소하고 TimeoutError 를 던진다 (저장되지 않았다).
+        이미 묶음에서 실행 중인 작업은 커밋될 수 있으므로 취소하지 않고 끝까지 기다려 실제 결과를 돌려준다.
+        """
+        future = self.submit(op)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise
+        # 실행 중인 묶음은 커밋/롤백으로 끝나고, 스레드가 죽어도 _fail_pending 이 결과를 채운다
+        return future.result()
+
+    def _run(self) -> None:
+        batch: List[Tuple[WriteOp, Future]] = []
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stopping = False
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._execute(batch)
+                batch = []
+                if stopping:
+                    return
+        except BaseException as e:
+            # 스레드가 죽으면 기다리는 호출자가 없도록 처리 중인 묶음과 대기열의 작업을 모두 실패시킨다.
+            # 다음 submit 이 새 스레드를 띄운다.
+            print(f"쓰기 스레드 중단: {e!r}")
+            self._reset_connection()
+            self._fail_pending(batch, e)
+            raise
+
+    def _fail_pending(self, batch: List[Tuple[WriteOp, Future]], error: BaseException) -> None:
+        pending = list(batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item)
+        for _, future in pending:
+            if future.done():
+                continue
+            if future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = get_connection()
+        return self._conn
+
+    def _execute(self, batch: List[Tuple[WriteOp, Future]]) -> None:
+        outcomes: List[Tuple[Future, Any, bool]] = []
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            for index, (op, future) in enumerate(batch):
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = f"write_op_{index}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    result = op(conn)
+                except Exception as e:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                    outcomes.append((future, e, True))
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+                    outcomes.append((future, result, False))
+            conn.commit()
+        except Exception as e:
+            # 트랜잭션 자체가 실패하면 묶음 전체가 저장되지 않았으므로 모두에게 알린다
+            print(f"쓰기 묶음 실패 ({len(batch)}건): {e}")
+            self._reset_connection()
+            for _, future in batch:
+                if future.done():
+                    continue
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+        for future, value, failed in outcomes:
+            if failed:
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    def _reset_connection(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+
+db_writer = GroupCommitWriter()
+
+
+__all__ = [
+    "GroupCommitWriter",
+    "db_writer",
+]